@@ -0,0 +1,100 @@
+#!/usr/bin/python
+##
+# @file constraints.py
+# @date 18.10.2026
+#
+# @brief Availability and room preferences of tutors.
+#
+# The constraints are read from a session configuration (JSON), e.g.:
+#
+#   {
+#     "tutors": {
+#       "Linus": {"available": [["08:00", "10:00"], ["12:00", "18:00"]]},
+#       "Mario": {"available": [["09:30", "23:59"]], "rooms": ["R1", "R2"]}
+#     }
+#   }
+#
+# - available: time windows (time of day, H:M) a tutor can supervise. A slot
+#   is available if it lies completely in a window. Hard constraint, the
+#   optimization only assigns available tutors. Default: always available.
+# - rooms: preferred rooms of a tutor. Soft constraint, slots in other rooms
+#   are penalized (see measures.count_room_preference_violations). Default:
+#   no preference.
+#
+
+import json
+import logging
+
+##
+# Availability and room preferences of the tutors of a timetable.
+##
+class Constraints:
+    ##
+    # Constructor
+    #
+    # available maps a tutor to a list of (from, to) windows in minutes since
+    # midnight, rooms maps a tutor to a set of preferred rooms. Tutors missing
+    # in available (rooms) are always available (have no preference).
+    ##
+    def __init__(self, available=None, rooms=None):
+        self.available = available if available is not None else {}
+        self.rooms = rooms if rooms is not None else {}
+
+    ##
+    # Returns true if the tutor can supervise a slot starting at 'start'
+    # (datetime) of length slotlen (minutes).
+    ##
+    def is_available(self, tutor, start, slotlen):
+        if tutor not in self.available:
+            return True
+        m = start.hour*60 + start.minute
+        for a, b in self.available[tutor]:
+            if a <= m and m + slotlen <= b:
+                return True
+        return False
+
+    ##
+    # Returns true if the tutor has no preference or prefers the room.
+    ##
+    def prefers(self, tutor, room):
+        return tutor not in self.rooms or room in self.rooms[tutor]
+
+##
+# Returns the minutes since midnight of a time of day in format H:M.
+##
+def parse_time(s):
+    hour, minute = s.split(':')
+    hour = int(hour)
+    minute = int(minute)
+    if hour < 0 or hour > 24 or minute < 0 or minute > 59:
+        raise RuntimeError('Invalid time of day %s (format H:M).' % (s))
+    return hour*60 + minute
+
+##
+# Reads the constraints of a session configuration file.
+##
+def load(filename, tutors, rooms):
+    log = logging.getLogger("constraints")
+    with open(filename, 'r') as f:
+        config = json.load(f)
+
+    available = {}
+    preferred = {}
+    for tutor, c in config.get('tutors', {}).items():
+        if tutor not in tutors:
+            log.warning('Constraints of unknown tutor %s ignored.', tutor)
+            continue
+        if 'available' in c:
+            windows = [(parse_time(a), parse_time(b)) for a, b in c['available']]
+            for a, b in windows:
+                if a >= b:
+                    raise RuntimeError('Empty availability window of tutor %s.' % (tutor))
+            available[tutor] = windows
+        if 'rooms' in c:
+            for room in c['rooms']:
+                if room not in rooms:
+                    raise RuntimeError('Unknown room %s preferred by tutor %s.' % (room, tutor))
+            preferred[tutor] = set(c['rooms'])
+    log.debug('%d tutors with availability windows, %d with room preferences.',
+              len(available), len(preferred))
+    return Constraints(available, preferred)
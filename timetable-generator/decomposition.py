@@ -0,0 +1,154 @@
+#!/usr/bin/python
+##
+# @file decomposition.py
+# @date 18.10.2026
+#
+# @brief Decomposition of large timetables into time windows.
+#
+# For many groups the genome gets long and the search space of the genetic
+# algorithm explodes. This solver splits the slot matrix along the column
+# (time) axis into overlapping windows:
+#
+# - The best schedule built by the seeding heuristics (see
+#   seeding.seed_genomes, linear in the number of slots) is the start.
+# - Each window is refined by local search independently (optionally in
+#   parallel processes) as a timetable of its own (see
+#   fastmeasures.Geometry.window), so a move costs O(window) instead of
+#   O(whole timetable). The weights of the balance measures (slot and test
+#   length differences) are scaled by the window's share of the slots:
+#   otherwise each window balances the loads of the tutors within the window
+#   at the cost of room changes, although only the loads of the whole test
+#   have to be balanced.
+# - The windows are stitched: the overlap of two windows is split in its
+#   middle, each half is taken from the window it belongs to.
+# - A final local search on the whole genome, starting at a low temperature
+#   (REPAIR_P0) to keep the work of the windows, repairs the borders (room
+#   changes, overlaps) and rebalances the tutors.
+#
+# Time and memory are bounded by the search budgets and a few copies of the
+# genome.
+#
+
+import logging
+import multiprocessing
+import random
+import numpy as np
+
+import evaluation
+import fastmeasures
+import localsearch
+import seeding
+
+# default window width and overlap of windows in columns (slots)
+WINDOW = 24
+OVERLAP = 6
+# default number of local search moves per window
+WINDOW_ITERATIONS = 5000
+# number of heuristic seeds the start is picked from
+SEEDS = 6
+# probability to accept an average worsening move at the start of the repair
+REPAIR_P0 = 1e-4
+
+##
+# Returns the windows (first column, last column + 1) covering num_cols
+# columns.
+##
+def windows(num_cols, width=WINDOW, overlap=OVERLAP):
+    if overlap >= width:
+        raise RuntimeError('Overlap (%d) of windows must be smaller than their width (%d).' % (overlap, width))
+    ws = []
+    a = 0
+    while True:
+        b = min(a + width, num_cols)
+        ws.append((a, b))
+        if b == num_cols:
+            return ws
+        a += width - overlap
+
+##
+# Returns the weights of the measures for a window of num_slots slots (see
+# module description).
+##
+def window_weights(geometry, num_slots):
+    weights = list(localsearch.cost_weights(geometry))
+    for m in (fastmeasures.SLOTDIFF, fastmeasures.TESTDIFF):
+        weights[m] *= num_slots / float(geometry.num_slots)
+    return weights
+
+##
+# Refines a window (job = (geometry of the window, genome of the window,
+# weights, iterations, time limit, random seed)). Returns the genome of the
+# window. Module level function to be usable by a process pool.
+##
+def optimize_window(job):
+    geometry, genome, weights, iterations, time_limit, seed = job
+    genome, m = localsearch.refine(geometry, genome, iterations, time_limit,
+                                   seed, weights)
+    return genome
+
+##
+# Stitches the genomes refined per window to a genome of the whole
+# timetable.
+##
+def stitch(geometry, genome, ws, window_genomes):
+    genome = np.array(genome, dtype=np.intp)
+    for k, (a, b) in enumerate(ws):
+        boundary = a
+        if k > 0:
+            boundary = (a + ws[k-1][1]) // 2
+        own = (geometry.cols >= boundary) & (geometry.cols < b)
+        genome[own] = np.asarray(window_genomes[k], dtype=np.intp)[own]
+    return genome.tolist()
+
+##
+# Solves the timetable by decomposition into time windows.
+#
+# Each window is refined with 'iterations' local search moves, the stitched
+# genome with 'repair_iterations' moves (no limit if None, see
+# localsearch.refine); time_limit (seconds) bounds each of these
+# refinements. Windows are refined by 'processes' worker processes.
+# The windows minimize the weighted sum of the measures, the repair the
+# objective if given (see localsearch.State). Returns the genome and its
+# measures.
+##
+def solve(geometry, width=WINDOW, overlap=OVERLAP,
+          iterations=WINDOW_ITERATIONS, repair_iterations=localsearch.ITERATIONS,
+          time_limit=None, processes=1, seed=None, objective=None):
+    log = logging.getLogger("decomposition")
+    rng = random.Random(seed)
+
+    seeds = seeding.seed_genomes(geometry, SEEDS, rng)
+    scores = evaluation.piecewise_population(geometry, seeds)
+    genome = seeds[int(np.argmax(scores))]
+    # windows without slots (e.g., last column of the slot matrix) are skipped
+    ws = []
+    jobs = []
+    for a, b in windows(geometry.num_cols, width, overlap):
+        window, slots = geometry.window(a, b)
+        if window.num_slots == 0:
+            continue
+        ws.append((a, b, slots))
+        jobs.append((window, [genome[i] for i in slots.tolist()],
+                     window_weights(geometry, window.num_slots),
+                     iterations, time_limit, rng.randint(0, 2**31-1)))
+    log.info('Refine %d windows of %d columns (overlap %d).', len(ws), width, overlap)
+
+    if processes > 1 and len(jobs) > 1:
+        pool = multiprocessing.Pool(processes)
+        window_genomes = pool.map(optimize_window, jobs)
+        pool.close()
+        pool.join()
+    else:
+        window_genomes = [optimize_window(job) for job in jobs]
+
+    # genomes of the whole timetable with the refined window
+    refined = []
+    for (a, b, slots), window_genome in zip(ws, window_genomes):
+        g = list(genome)
+        for i, t in zip(slots.tolist(), window_genome):
+            g[i] = t
+        refined.append(g)
+    genome = stitch(geometry, genome, [(a, b) for a, b, slots in ws], refined)
+    return localsearch.refine(geometry, genome, repair_iterations, time_limit,
+                              rng.randint(0, 2**31-1), objective=objective,
+                              p0=REPAIR_P0)
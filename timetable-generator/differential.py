@@ -0,0 +1,499 @@
+#!/usr/bin/python
+##
+# @file differential.py
+# @date 18.10.2026
+#
+# @brief Differential tests of the fast measures and evaluation functions.
+#
+# The optimizers score genomes with fast implementations of the measures and
+# evaluation functions. This script checks them against the reference
+# implementation (measures.py, evaluation.piecewise_linear, evaluation.fuzzy)
+# on random timetables and genomes:
+#
+# - measures: fastmeasures.measures_matrix vs. count_overlaps,
+#   sum_up_slot_differences, sum_up_testlength_differences,
+#   count_room_changes, count_tutor_holes and
+#   count_room_preference_violations (exact).
+# - incremental: measures of localsearch.State after random moves (and undo)
+#   vs. measures.py (exact).
+# - piecewise: evaluation.piecewise_population vs. piecewise_linear (up to
+#   rounding, TOLERANCE; timetables with more slots than twice the number of
+#   rooms).
+# - fuzzy: evaluation.fuzzy_population vs. fuzzy (exact, the reference
+#   raises an error where the fast path returns NaN; timetables with more
+#   slots than rooms).
+# - inputs: evaluation.fuzzy_batch vs. the skfuzzy control system simulation
+#   on input sets beyond the measures of genomes: values at and next to the
+#   breakpoints of the membership functions (including gaps of the rule base)
+#   and random values in the universes, also fractional (exact, NaN where
+#   the simulation raises an error).
+# - bound: evaluation.fuzzy_bound vs. fuzzy_batch (the bound is not below the
+#   score, else evaluation.Prescreen could change the evolution; 0 if no rule
+#   fires). The speedup is the one of the prescreening.
+# - balance: tutors available for less than their share of the slots (see
+#   measures.get_balance) get at most as many slots as they can
+#   supervise without overlaps after a local search (piecewise linear cost,
+#   BALANCE_ITERATIONS moves), i.e., the balance measures do not trade
+#   overlaps for a more equal number of slots. Timetables where overlaps are
+#   unavoidable (a start time with more slots than available tutors) are
+#   skipped. No reference path.
+#
+# Timetables vary in test number, number of groups and tutors, start time and
+# constraints of the tutors (see constraints.py). Late tests run past
+# midnight. Genomes are random (available
+# tutors), built by the seeding heuristics, sorted (long blocks) or
+# constant, so both good and bad schedules are covered.
+#
+# A failing case is shrunk to a minimal example: the timetable is made
+# smaller (fewer groups and tutors) and the genome simpler (genes set to the
+# first available tutor) as long as the check still fails. The script prints
+# the minimal failing cases and the time spent in the reference and fast
+# paths (a benchmark of the speedup), and exits with status 1 if any check
+# failed.
+#
+
+import argparse
+import datetime
+import logging
+import random
+import sys
+import time
+import numpy as np
+
+from timetable import Timetable
+import constraints
+import evaluation
+import fastmeasures
+import localsearch
+import measures
+import seeding
+import skfuzzy.control
+
+# default number of timetables and genomes per timetable
+CASES = 30
+GENOMES = 10
+
+# maximum difference of piecewise linear scores (rounding)
+TOLERANCE = 1e-9
+
+# number of input sets of the fuzzy system checked per genome
+INPUTS = 10
+
+# number of local search moves of the balance check
+BALANCE_ITERATIONS = 1000
+
+ROOMS = ['R1', 'R2', 'R3', 'R4']
+
+##
+# Returns the measures of the timetable computed by measures.py (in the order
+# of fastmeasures.MEASURE_NAMES).
+##
+def reference_measures(timetable):
+    m = [0] * fastmeasures.NUM_MEASURES
+    m[fastmeasures.OVERLAPS] = measures.count_overlaps(timetable)
+    m[fastmeasures.SLOTDIFF] = measures.sum_up_slot_differences(timetable)
+    m[fastmeasures.TESTDIFF] = measures.sum_up_testlength_differences(timetable)
+    m[fastmeasures.RCHANGES] = measures.count_room_changes(timetable)
+    m[fastmeasures.HOLES] = measures.count_tutor_holes(timetable)
+    m[fastmeasures.RPREFS] = measures.count_room_preference_violations(timetable)
+    return m
+
+##
+# Random timetable of a differential test.
+##
+class Case:
+    ##
+    # Constructor
+    #
+    # shape is a tuple (test number, number of groups, number of tutors,
+    # start time, random seed of the constraints).
+    ##
+    def __init__(self, shape):
+        self.shape = shape
+        test, groups, num_tutors, start, seed = shape
+        rng = random.Random(seed)
+        tutors = ['T%d' % (k) for k in range(num_tutors)]
+        rooms = ROOMS if test == 1 else ROOMS[3:] + ROOMS[:3]
+        available = {}
+        preferred = {}
+        for tutor in tutors:
+            if rng.random() < 0.3:
+                a = rng.randint(0, 12*60)
+                available[tutor] = [(a, 24*60)]
+            elif rng.random() < 0.2:
+                # narrow window, less than a share of the slots
+                a = rng.randint(6*60, 20*60)
+                available[tutor] = [(a, a + rng.randint(30, 180))]
+            if rng.random() < 0.3:
+                preferred[tutor] = set(rng.sample(rooms, rng.randint(1, len(rooms))))
+        # some timetables without constraints (room preferences not rated)
+        tutor_constraints = None
+        if rng.random() < 0.8:
+            tutor_constraints = constraints.Constraints(available, preferred)
+        self.timetable = Timetable(start, test, rooms, tutors, groups, tutor_constraints)
+        self.geometry = fastmeasures.Geometry(self.timetable)
+        self._fuzzy = None
+
+    ##
+    # Maps a genome to the timetable.
+    ##
+    def apply(self, genome):
+        for s, t in zip(self.timetable.get_slots(), genome):
+            s.set_tutor(self.timetable.tutors[t])
+
+    ##
+    # Initializes the fuzzy control system of the timetable (if not already).
+    ##
+    def fuzzy_init(self):
+        if self._fuzzy is None:
+            self._fuzzy = evaluation.fuzzy_system(self.timetable)
+        evaluation.fs['scoring_ctrl'], evaluation.fs['score'], evaluation.fs['compiled'] = self._fuzzy
+
+    ##
+    # Returns the genome of another (larger) timetable fitted to this
+    # timetable: genes are truncated and replaced by available tutors.
+    ##
+    def project(self, genome):
+        g = self.geometry
+        genome = (list(genome) * (1 + g.num_slots // max(1, len(genome))))[:g.num_slots]
+        return [seeding.available(g, i, t % g.num_tutors) for i, t in enumerate(genome)]
+
+    ##
+    # Returns genomes of the timetable (the kind of genome is chosen by k).
+    ##
+    def genome(self, k, rng):
+        g = self.geometry
+        np_rng = np.random.RandomState(rng.randint(0, 2**31-1))
+        kind = k % 4
+        if kind == 0:
+            return fastmeasures.random_genomes(g, 1, np_rng)[0].tolist()
+        if kind == 1:
+            return seeding.seed_genomes(g, 1 + k % 3, rng)[-1]
+        if kind == 2:
+            # long blocks of a tutor (in slot order), mostly feasible
+            genome = np.sort(fastmeasures.random_genomes(g, 1, np_rng)[0])
+            return [seeding.available(g, i, t) for i, t in enumerate(genome.tolist())]
+        return g.options[:, 0].tolist()
+
+##
+# Returns a random shape of a timetable.
+##
+def random_shape(rng, max_groups):
+    while True:
+        shape = (rng.choice([1, 2]), rng.randint(1, max_groups), rng.randint(len(ROOMS), 8),
+                 datetime.datetime(2016, 1, 22, rng.randint(6, 22), rng.choice([0, 10, 15, 30, 45])),
+                 rng.randint(0, 2**31-1))
+        try:
+            case = Case(shape)
+        except RuntimeError:
+            # a slot without available tutor
+            continue
+        return case
+
+
+#
+# Checks: return None if the fast path matches the reference, otherwise a
+# description of the difference. Time spent per path is added to 'timing'.
+#
+
+def _timed(timing, key, f, *args):
+    started = time.time()
+    result = f(*args)
+    timing[key] = timing.get(key, 0.0) + time.time() - started
+    return result
+
+def check_measures(case, genome, timing):
+    case.apply(genome)
+    ref = _timed(timing, 'reference', reference_measures, case.timetable)
+    fast = _timed(timing, 'fast', fastmeasures.measures_matrix, case.geometry, genome)[0].tolist()
+    if ref != fast:
+        return 'reference %s, fast %s' % (ref, fast)
+    return None
+
+def check_incremental(case, genome, timing):
+    rng = random.Random(len(genome))
+    state = localsearch.State(case.geometry, genome)
+    moves = []
+    for k in range(50):
+        changes = _timed(timing, 'fast', localsearch.random_move, state, rng)
+        if rng.random() < 0.3:
+            localsearch.undo(state, changes)
+        else:
+            moves.append(changes)
+    for changes in reversed(moves[len(moves)//2:]):
+        localsearch.undo(state, changes)
+    fast = _timed(timing, 'fast', state.measures)
+    case.apply(state.genome)
+    ref = _timed(timing, 'reference', reference_measures, case.timetable)
+    if ref != fast:
+        return 'reference %s, incremental %s (genome after moves %s)' % (ref, fast, state.genome)
+    return None
+
+def check_piecewise(case, genome, timing):
+    if case.geometry.num_slots <= 2 * case.geometry.num_rooms:
+        # maximum of room changes not positive, reference undefined
+        return None
+    case.apply(genome)
+    ref = _timed(timing, 'reference', evaluation.piecewise_linear, case.timetable)
+    fast = _timed(timing, 'fast', evaluation.piecewise_population, case.geometry, genome)[0]
+    if abs(ref - fast) > TOLERANCE:
+        return 'reference %r, fast %r' % (ref, fast)
+    return None
+
+def check_fuzzy(case, genome, timing):
+    if case.geometry.num_slots <= case.geometry.num_rooms:
+        # universe of room changes empty, reference undefined
+        return None
+    case.fuzzy_init()
+    case.apply(genome)
+    try:
+        ref = _timed(timing, 'reference', evaluation.fuzzy, case.timetable)
+    except ValueError:
+        # no rule activated
+        ref = float('nan')
+    fast = _timed(timing, 'fast', evaluation.fuzzy_population, case.geometry, genome)[0]
+    if not (ref == fast or (np.isnan(ref) and np.isnan(fast))):
+        return 'reference %r, fast %r' % (ref, fast)
+    return None
+
+##
+# Returns the score of the skfuzzy control system simulation of the case for
+# an input set (columns evaluation.FUZZY_INPUTS), NaN if no rule fires.
+##
+def reference_fuzzy(inputs):
+    scoring = skfuzzy.control.ControlSystemSimulation(evaluation.fs['scoring_ctrl'])
+    for label, x in zip(evaluation.FUZZY_INPUTS, inputs):
+        scoring.input[label] = x
+    try:
+        scoring.compute()
+    except ValueError:
+        return float('nan')
+    return scoring.output['score']
+
+##
+# Returns random input sets of the fuzzy system of the case: per input
+# values at and next to the breakpoints of its membership functions, in the
+# middle between them, or random in its universe. Half of the sets have no
+# overlaps (otherwise the rule of unacceptable schedules decides).
+##
+def fuzzy_inputs(case, n, rng):
+    columns = []
+    for label in evaluation.FUZZY_INPUTS:
+        universe, terms = evaluation.fs['compiled']['inputs'][label]
+        points = set([0, len(universe) - 1])
+        for mf in terms.values():
+            for k in (np.flatnonzero(np.diff(mf, 2) != 0) + 1).tolist():
+                points.update([k - 1, k, k + 1])
+        values = [float(universe[k]) for k in sorted(points) if 0 <= k < len(universe)]
+        values += [(a + b) / 2.0 for a, b in zip(values[:-1], values[1:])]
+        column = []
+        for k in range(n):
+            if label == 'overlaps' and rng.random() < 0.5:
+                column.append(0.0)
+            elif rng.random() < 0.8:
+                column.append(rng.choice(values))
+            else:
+                column.append(rng.uniform(universe[0], universe[-1]))
+        columns.append(column)
+    return np.array(columns).T
+
+def check_inputs(case, genome, timing):
+    if case.geometry.num_slots <= case.geometry.num_rooms:
+        return None
+    case.fuzzy_init()
+    rng = random.Random(sum(genome) + len(genome))
+    inputs = fuzzy_inputs(case, INPUTS, rng)
+    ref = np.array([_timed(timing, 'reference', reference_fuzzy, x) for x in inputs.tolist()])
+    fast = _timed(timing, 'fast', evaluation.fuzzy_batch, inputs)
+    differ = ~((ref == fast) | (np.isnan(ref) & np.isnan(fast)))
+    if differ.any():
+        k = np.flatnonzero(differ)[0]
+        return 'inputs %s: reference %r, fast %r' % (inputs[k].tolist(), ref[k], fast[k])
+    return None
+
+def check_bound(case, genome, timing):
+    if case.geometry.num_slots <= case.geometry.num_rooms:
+        return None
+    case.fuzzy_init()
+    inputs = fastmeasures.measures_matrix(case.geometry, genome)[:, evaluation.FUZZY_MEASURES]
+    score = _timed(timing, 'reference', evaluation.fuzzy_batch, inputs)[0]
+    bound = _timed(timing, 'fast', evaluation.fuzzy_bound, inputs)[0]
+    if (np.isnan(score) and bound != 0) or bound < score:
+        return 'score %r, bound %r (inputs %s)' % (score, bound, inputs[0].tolist())
+    return None
+
+def check_balance(case, genome, timing):
+    g = case.geometry
+    limited = np.flatnonzero(g.slot_offsets > 0)
+    # available tutors per start time (column), availability depends on the
+    # start time of a slot only
+    available = np.zeros((g.num_cols, g.num_tutors), dtype=bool)
+    available[g.cols] = g.feasible
+    if len(limited) == 0 or (np.bincount(g.cols, minlength=g.num_cols) > available.sum(axis=1)).any():
+        return None
+    refined, m = _timed(timing, 'fast', localsearch.refine, g, genome, BALANCE_ITERATIONS,
+                        None, len(genome))
+    counts = fastmeasures.count_slots(g, refined)[0]
+    over = limited[counts[limited] > g.capacity[limited]]
+    if len(over) > 0:
+        return 'tutors %s: %s slots, capacity %s (overlaps %d, refined genome %s)' % (
+            over.tolist(), counts[over].tolist(), g.capacity[over].tolist(),
+            m[fastmeasures.OVERLAPS], refined)
+    return None
+
+CHECKS = [
+    ('measures', check_measures),
+    ('incremental', check_incremental),
+    ('piecewise', check_piecewise),
+    ('fuzzy', check_fuzzy),
+    ('inputs', check_inputs),
+    ('bound', check_bound),
+    ('balance', check_balance),
+]
+
+# population (batch) versions of the fast paths, must give the same results
+# as the fast path per genome
+BATCHES = {
+    'measures': lambda case, genomes: fastmeasures.measures_matrix(case.geometry, genomes),
+    'piecewise': lambda case, genomes: evaluation.piecewise_population(case.geometry, genomes),
+    'fuzzy': lambda case, genomes: evaluation.fuzzy_population(case.geometry, genomes),
+    'bound': lambda case, genomes: evaluation.fuzzy_bound(
+        fastmeasures.measures_matrix(case.geometry, genomes)[:, evaluation.FUZZY_MEASURES]),
+}
+
+##
+# Checks the batch version of a fast path on the genomes of a case (results
+# equal to the results per genome, piecewise linear scores up to rounding).
+# Returns None or the first genome with a different result and a description
+# of the difference.
+##
+def check_batch(name, case, genomes, timing):
+    fuzzy = name in ('fuzzy', 'bound')
+    if fuzzy and case.geometry.num_slots <= case.geometry.num_rooms:
+        return None
+    if fuzzy:
+        case.fuzzy_init()
+    batch = _timed(timing, 'batch', BATCHES[name], case, genomes)
+    for genome, b in zip(genomes, batch):
+        s = BATCHES[name](case, [genome])[0]
+        if name == 'piecewise':
+            same = abs(b - s) <= TOLERANCE
+        else:
+            same = (np.asarray(b == s) | (np.isnan(b) & np.isnan(s))).all()
+        if not same:
+            return genome, 'batch %s, per genome %s' % (np.asarray(b).tolist(), np.asarray(s).tolist())
+    return None
+
+##
+# Shrinks a failing case (timetable and genome) to a minimal failing case.
+#
+# The shape of the timetable is reduced while the genome fitted to the smaller
+# timetable (or a new genome of it) still fails, then genes are set to the
+# first available tutor while the check still fails. Returns the case, genome
+# and description of the difference.
+##
+def shrink(check, case, genome, message):
+    fails = lambda c, g: check(c, g, {})
+    rng = random.Random(0)
+    progress = True
+    while progress:
+        progress = False
+        test, groups, num_tutors, start, seed = case.shape
+        for shape in [(test, groups - 1, num_tutors, start, seed),
+                      (test, groups, num_tutors - 1, start, seed),
+                      (1, groups, num_tutors, start, seed)]:
+            if shape == case.shape or shape[1] < 1 or shape[2] < len(ROOMS):
+                continue
+            try:
+                smaller = Case(shape)
+            except RuntimeError:
+                continue
+            for k in range(8):
+                g = smaller.project(genome) if k == 0 else smaller.genome(k, rng)
+                m = fails(smaller, g)
+                if m is not None:
+                    case, genome, message = smaller, g, m
+                    progress = True
+                    break
+            if progress:
+                break
+
+    simple = case.geometry.options[:, 0].tolist()
+    for i in range(len(genome)):
+        if genome[i] == simple[i]:
+            continue
+        g = list(genome)
+        g[i] = simple[i]
+        m = fails(case, g)
+        if m is not None:
+            genome, message = g, m
+    return case, genome, message
+
+def main():
+    parser = argparse.ArgumentParser(description='Differential tests of the fast measures ' \
+                                     'and evaluation functions against the reference implementation.')
+    parser.add_argument('-n', '--cases', type=int, default=CASES,
+                        help='Number of random timetables, default: ' + str(CASES))
+    parser.add_argument('-k', '--genomes', type=int, default=GENOMES,
+                        help='Number of genomes per timetable, default: ' + str(GENOMES))
+    parser.add_argument('-g', '--groups', type=int, default=24,
+                        help='Maximum number of groups of a timetable, default: 24')
+    parser.add_argument('--checks', type=str, nargs='+', choices=[name for name, check in CHECKS],
+                        default=[name for name, check in CHECKS],
+                        help='Checks to run, default: all.')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='Random seed, default: random.')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    seed = args.seed if args.seed is not None else random.randint(0, 2**31-1)
+    rng = random.Random(seed)
+    checks = [(name, check) for name, check in CHECKS if name in args.checks]
+    timing = dict((name, {}) for name, check in checks)
+    runs = dict((name, 0) for name, check in checks)
+    failures = []
+
+    for c in range(args.cases):
+        case = random_shape(rng, args.groups)
+        genomes = [case.genome(k, rng) for k in range(args.genomes)]
+        for genome in genomes:
+            for name, check in checks:
+                runs[name] += 1
+                message = check(case, genome, timing[name])
+                if message is not None:
+                    failures.append((name, shrink(check, case, genome, message)))
+        for name, check in checks:
+            if name in BATCHES:
+                failure = check_batch(name, case, genomes, timing[name])
+                if failure is not None:
+                    failures.append((name + ' (batch)', (case,) + failure))
+
+    print 'Differential tests (seed %d, %d timetables, %d genomes each):' % (seed, args.cases, args.genomes)
+    print ' check       |  runs | failures | reference [s] | fast [s] | speedup | batch [s] | speedup'
+    for name, check in checks:
+        ref = timing[name].get('reference', 0.0)
+        fast = timing[name].get('fast', 0.0)
+        batch = timing[name].get('batch', 0.0)
+        batch = '%9.3f | %6.1fx' % (batch, ref / batch) if batch > 0 else '%9s | %7s' % ('-', '-')
+        if ref > 0:
+            ref = '%13.3f | %8.3f | %6.1fx' % (ref, fast, ref / fast if fast > 0 else float('nan'))
+        else:
+            # no reference path
+            ref = '%13s | %8.3f | %7s' % ('-', fast, '-')
+        print ' %-11s | %5d | %8d | %s | %s' % (
+            name, runs[name], len([f for f in failures if f[0].split()[0] == name]), ref, batch)
+    reported = set()
+    for name, (case, genome, message) in failures:
+        if (name, case.shape, tuple(genome)) in reported:
+            continue
+        reported.add((name, case.shape, tuple(genome)))
+        test, groups, num_tutors, start, seed = case.shape
+        print
+        print 'FAILED %s: test %d, %d groups, %d tutors, start %s, constraints seed %d' % (
+            name, test, groups, num_tutors, start.strftime('%d.%m.%Y %H:%M'), seed)
+        print '  genome: %s' % (genome)
+        print '  %s' % (message)
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -11,91 +11,155 @@
 
 import logging
 import measures
+import fastmeasures
 import numpy as np
 import skfuzzy
 import skfuzzy.control
+from skfuzzy.control.term import TermAggregate
+
+# weights of the criteria of the piecewise linear evaluation function
+PIECEWISE_WEIGHTS = {
+    'slotdiff': 5.0, # equal number of slots for each tutor
+    'testdiff': 4.0, # equal overall time at test for each tutor
+    'overlaps': 10.0, # non-overlapping slots
+    'rchanges': 0.8, # no tutor changes
+    'holes': 0.5, # no holes for tutor
+    'rprefs': 1.0, # tutors supervise their preferred rooms
+    'pause': 0.0, # pause in the middle of the test
+}
 
 ##
 # Piecewise linear evaluation function.
+#
+# The weights of the criteria default to PIECEWISE_WEIGHTS (missing criteria
+# too).
 ##
-def piecewise_linear(timetable, loglevel=logging.INFO):
+def piecewise_linear(timetable, loglevel=logging.INFO, weights=None):
     # init logger for this function
     log = logging.getLogger("evaluation.piecewise_linear")
     log.setLevel(loglevel)
+    weights = dict(PIECEWISE_WEIGHTS, **(weights or {}))
 
     # init score
     score = 0.0
-    log.debug('score: %.2f' %(score))
+    log.debug('score: %.2f', score)
 
-    # equal number of slots for each tutor
-    weight = 5.0
+    # equal number of slots for each tutor (tutors available for less than
+    # their share count with the share, see measures.get_balance)
+    slot_offsets, testlen_balanced = measures.get_balance(timetable)
+    weight = weights['slotdiff']
     maximum = len(timetable.get_slots()) * (len(timetable.tutors))
     reached = maximum
     tutor_cnt = []
-    for tutor in timetable.tutors:
-        c = measures.count_slots_of_tutor(timetable, tutor)
+    for tutor, offset in zip(timetable.tutors, slot_offsets):
+        c = measures.count_slots_of_tutor(timetable, tutor) + offset
         tutor_cnt.append(c)
     for i in range(0, len(tutor_cnt)):
         for j in range(0, len(tutor_cnt)):
             if i != j:
                 reached -= abs(tutor_cnt[i]-tutor_cnt[j])
-    log.debug('[ %2.1f ] equal number of slots for each tutor: %d / %d' % (weight, reached, maximum))
+    log.debug('[ %2.1f ] equal number of slots for each tutor: %d / %d', weight, reached, maximum)
     score += weight * reached/maximum
-    log.debug('score: %.2f' %(score))
+    log.debug('score: %.2f', score)
 
-    # equal overall time at test for each tutor
-    weight = 4.0
+    # equal overall time at test for each tutor (available long enough)
+    weight = weights['testdiff']
     maximum = len(timetable.get_slots()) * (len(timetable.tutors))
     reached = maximum
     tutor_cnt = []
-    for tutor in timetable.tutors:
-        c = measures.get_test_length_for_tutor(timetable, tutor)
-        tutor_cnt.append(c)
+    for tutor, balanced in zip(timetable.tutors, testlen_balanced):
+        if balanced:
+            c = measures.get_test_length_for_tutor(timetable, tutor)
+            tutor_cnt.append(c)
     for i in range(0, len(tutor_cnt)):
         for j in range(0, len(tutor_cnt)):
             if i != j:
                 reached -= abs(tutor_cnt[i]-tutor_cnt[j])
-    log.debug('[ %2.1f ] equal overall time: %d / %d' % (weight, reached, maximum))
+    log.debug('[ %2.1f ] equal overall time: %d / %d', weight, reached, maximum)
     score += weight * reached/maximum
-    log.debug('score: %.2f' %(score))
+    log.debug('score: %.2f', score)
 
     # non-overlapping slots
-    weight = 10.0
+    weight = weights['overlaps']
     maximum = len(timetable.get_slots()) * (len(timetable.tutors))
     reached = maximum - measures.count_overlaps(timetable)
-    log.debug('[ %2.1f ] non-overlapping slots: %d / %d' % (weight, reached, maximum))
+    log.debug('[ %2.1f ] non-overlapping slots: %d / %d', weight, reached, maximum)
     score += weight * reached/maximum
-    log.debug('score: %.2f' %(score))
+    log.debug('score: %.2f', score)
 
     # no tutor changes (tutors should have consecutive slots in the same room)
-    weight = 0.8
+    weight = weights['rchanges']
     maximum = len(timetable.get_slots()) - len(timetable.rooms)*2
     reached = maximum - measures.count_room_changes(timetable)
-    log.debug('[ %2.1f ] no tutor changes: %d / %d' % (weight, reached, maximum))
+    log.debug('[ %2.1f ] no tutor changes: %d / %d', weight, reached, maximum)
     score += weight * reached/maximum
-    log.debug('score: %.2f' %(score))
+    log.debug('score: %.2f', score)
 
     # no holes for tutor (tutor prefers only few "holes" in his/hers schedule)
-    weight = 0.5
+    weight = weights['holes']
     maximum = len(timetable.get_slots())
     reached = maximum - measures.count_tutor_holes(timetable)
-    log.debug('[ %2.1f ] no holes for tutor: %d / %d' % (weight, reached, maximum))
+    log.debug('[ %2.1f ] no holes for tutor: %d / %d', weight, reached, maximum)
     score += weight * reached/maximum
-    log.debug('score: %.2f' %(score))
+    log.debug('score: %.2f', score)
+
+    # tutors supervise their preferred rooms (see constraints.py), rated only
+    # if a tutor has preferred rooms
+    if timetable.constraints != None and len(timetable.constraints.rooms) > 0:
+        weight = weights['rprefs']
+        maximum = len(timetable.get_slots())
+        reached = maximum - measures.count_room_preference_violations(timetable)
+        log.debug('[ %2.1f ] preferred rooms: %d / %d', weight, reached, maximum)
+        score += weight * reached/maximum
+        log.debug('score: %.2f', score)
 
     # pause in the middle of the test (should have higher weight than overall
     # test time)
-    weight = 0.0
+    weight = weights['pause']
     maximum = len(timetable.get_slots())
     reached = maximum
     for tutor in timetable.tutors:
         reached -= measures.pause_offset_to_testcenter_of_tutor(timetable, tutor)
-    log.debug('[ %2.1f ] pause: %d / %d' % (weight, reached, maximum))
+    log.debug('[ %2.1f ] pause: %d / %d', weight, reached, maximum)
     score += weight * reached/maximum
-    log.debug('score: %.2f' %(score))
+    log.debug('score: %.2f', score)
 
     return score
 
+##
+# Returns the piecewise linear evaluation function as constant and
+# coefficients of the measures (see fastmeasures.measures_matrix), i.e., the
+# score is constant - coefficients * measures.
+#
+# Slot and test length differences are summed over all ordered pairs of
+# tutors in piecewise_linear, hence the factor 2.
+##
+def piecewise_coefficients(geometry, weights=None):
+    weights = dict(PIECEWISE_WEIGHTS, **(weights or {}))
+    w = np.zeros(fastmeasures.NUM_MEASURES)
+    maximum = float(geometry.num_slots * geometry.num_tutors)
+    w[fastmeasures.OVERLAPS] = weights['overlaps'] / maximum
+    w[fastmeasures.SLOTDIFF] = 2 * weights['slotdiff'] / maximum
+    w[fastmeasures.TESTDIFF] = 2 * weights['testdiff'] / maximum
+    w[fastmeasures.RCHANGES] = weights['rchanges'] / max(1, geometry.num_slots - geometry.num_rooms*2)
+    w[fastmeasures.HOLES] = weights['holes'] / max(1, geometry.num_slots)
+    w[fastmeasures.RPREFS] = weights['rprefs'] / max(1, geometry.num_slots)
+    if not geometry.has_room_preferences:
+        # room preferences are not rated
+        w[fastmeasures.RPREFS] = 0.0
+        del weights['rprefs']
+    return sum(weights.values()), w
+
+##
+# Vectorized piecewise linear evaluation of a population of genomes.
+#
+# Equals piecewise_linear up to rounding (if there are more slots than twice
+# the number of rooms).
+##
+def piecewise_population(geometry, genomes, weights=None):
+    constant, w = piecewise_coefficients(geometry, weights)
+    return constant - fastmeasures.measures_matrix(geometry, genomes).dot(w)
+
 
 #
 # fuzzy logic
@@ -111,11 +175,31 @@ def piecewise_linear(timetable, loglevel=logging.INFO):
 ##
 fs = {}
 
+# input variables of the fuzzy control system (columns of an input matrix of
+# fuzzy_batch) and corresponding columns of the measures matrix
+FUZZY_INPUTS = ['overlaps', 'slotdiff', 'testdiff', 'rchanges']
+FUZZY_MEASURES = [fastmeasures.OVERLAPS, fastmeasures.SLOTDIFF,
+                  fastmeasures.TESTDIFF, fastmeasures.RCHANGES]
+
+# breakpoints of the triangular membership functions of the inputs, relative
+# to the maximum of the universe of the input
+FUZZY_BREAKPOINTS = {
+    'slotdiff': {'poor': [0.15, 1, 1], 'average': [0.03, 0.1, 0.17], 'good': [0, 0, 0.05]},
+    'testdiff': {'poor': [0.3, 1, 1], 'average': [0.05, 0.2, 0.35], 'good': [0, 0, 0.1]},
+    'rchanges': {'poor': [0.2, 1, 1], 'average': [0.05, 0.15, 0.25], 'good': [0, 0, 0.1]},
+}
+
 ##
-# Initialization function for fuzzy evaluation.
+# Creates the fuzzy control system of a timetable.
+#
+# Breakpoints (same structure as FUZZY_BREAKPOINTS) override the default
+# breakpoints of the membership functions. Returns the control system, the
+# output variable and the compiled form for fuzzy_batch.
 ##
-def fuzzy_init(timetable):
-    global fs
+def fuzzy_system(timetable, breakpoints=None):
+    bps = {}
+    for var, terms in FUZZY_BREAKPOINTS.items():
+        bps[var] = dict(terms, **(breakpoints or {}).get(var, {}))
 
     # universe variables (inputs and outputs)
     slotdiff_range = [0, (len(timetable.tutors)-1)*len(timetable.get_slots())] # min: equal number of slots; max: a tutor can have all slots
@@ -140,17 +224,9 @@ def fuzzy_init(timetable):
     overlaps['unacceptable'] = skfuzzy.trimf(overlaps.universe, [overlaps_range[0]+1, overlaps_range[1], overlaps_range[1]])
     overlaps['ok'] = skfuzzy.trimf(overlaps.universe, [overlaps_range[0], overlaps_range[0], overlaps_range[0]+1])
 
-    slotdiff['poor'] = skfuzzy.trimf(slotdiff.universe, [slotdiff_range[1]*0.15, slotdiff_range[1], slotdiff_range[1]])
-    slotdiff['average'] = skfuzzy.trimf(slotdiff.universe, [slotdiff_range[1]*0.03, slotdiff_range[1]*0.1, slotdiff_range[1]*0.17])
-    slotdiff['good'] = skfuzzy.trimf(slotdiff.universe, [slotdiff_range[0], slotdiff_range[0], slotdiff_range[1]*0.05])
-
-    testdiff['poor'] = skfuzzy.trimf(testdiff.universe, [testdiff_range[1]*0.3, testdiff_range[1], testdiff_range[1]])
-    testdiff['average'] = skfuzzy.trimf(testdiff.universe, [testdiff_range[1]*0.05, testdiff_range[1]*0.2, testdiff_range[1]*0.35])
-    testdiff['good'] = skfuzzy.trimf(testdiff.universe, [testdiff_range[0], testdiff_range[0], testdiff_range[1]*0.1])
-
-    rchanges['poor'] = skfuzzy.trimf(rchanges.universe, [rchanges_range[1]*0.2, rchanges_range[1], rchanges_range[1]])
-    rchanges['average'] = skfuzzy.trimf(rchanges.universe, [rchanges_range[1]*0.05, rchanges_range[1]*0.15, rchanges_range[1]*0.25])
-    rchanges['good'] = skfuzzy.trimf(rchanges.universe, [rchanges_range[0], rchanges_range[0], rchanges_range[1]*0.1])
+    for var, var_range in [(slotdiff, slotdiff_range), (testdiff, testdiff_range), (rchanges, rchanges_range)]:
+        for term in ['poor', 'average', 'good']:
+            var[term] = skfuzzy.trimf(var.universe, [var_range[1]*x for x in bps[var.label][term]])
 
     score['unacceptable'] = skfuzzy.trapmf(score.universe, [score_range[0], score_range[0], score_range[0], score_range[1]*0.25])
     score['poor'] = skfuzzy.trimf(score.universe, [score_range[1]*0.25, score_range[1]*0.5, score_range[1]*0.5])
@@ -158,12 +234,6 @@ def fuzzy_init(timetable):
     score['good'] = skfuzzy.trimf(score.universe, [score_range[1]*0.75, score_range[1]*0.9, score_range[1]*0.9])
     score['superior'] = skfuzzy.trimf(score.universe, [score_range[1]*0.9, score_range[1], score_range[1]])
 
-    # overlaps.view()
-    # slotdiff.view()
-    # testdiff.view()
-    # rchanges.view()
-    score.view()
-
     # fuzzy rules
     rules = []
     rules.append( skfuzzy.control.Rule(overlaps['unacceptable']
@@ -218,12 +288,265 @@ def fuzzy_init(timetable):
                                        score['superior']) )
 
     
-    # create fuzzy control system
-    fs['scoring_ctrl'] = skfuzzy.control.ControlSystem(rules)
+    # create fuzzy control system and its compiled form for vectorized
+    # inference
+    return (skfuzzy.control.ControlSystem(rules), score,
+            fuzzy_compile([overlaps, slotdiff, testdiff, rchanges], score, rules))
+
+##
+# Initialization function for fuzzy evaluation.
+##
+def fuzzy_init(timetable, breakpoints=None):
+    global fs
+
+    fs['scoring_ctrl'], score, fs['compiled'] = fuzzy_system(timetable, breakpoints)
 
     # for debugging
     fs['score'] = score
 
+    # overlaps.view()
+    # slotdiff.view()
+    # testdiff.view()
+    # rchanges.view()
+    score.view()
+
+##
+# Returns the antecedent of a rule as nested tuples: ('and'|'or', left,
+# right), ('not', term) or ('term', variable, label).
+##
+def _compile_antecedent(term):
+    if isinstance(term, TermAggregate):
+        if term.kind == 'not':
+            return ('not', _compile_antecedent(term.term1))
+        return (term.kind, _compile_antecedent(term.term1), _compile_antecedent(term.term2))
+    return ('term', term.parent.label, term.label)
+
+##
+# Compiles the fuzzy control system (variables, membership functions and
+# rules) for fuzzy_batch.
+##
+def fuzzy_compile(inputs, output, rules):
+    compiled = {}
+    compiled['inputs'] = dict((var.label, (np.asarray(var.universe, dtype=np.float64),
+                                           dict((label, np.asarray(term.mf, dtype=np.float64))
+                                                for label, term in var.terms.items())))
+                              for var in inputs)
+    compiled['rules'] = [(_compile_antecedent(rule.antecedent),
+                          [(c.term.label, c.weight) for c in rule.consequent],
+                          rule.and_func, rule.or_func)
+                         for rule in rules]
+    # output terms in order of the consequent, terms without rules are ignored
+    used = set(label for a, cs, f, g in compiled['rules'] for label, w in cs)
+    labels = [label for label in output.terms.keys() if label in used]
+    compiled['output'] = (np.asarray(output.universe, dtype=np.float64), labels,
+                          np.array([output.terms[label].mf for label in labels], dtype=np.float64))
+    compiled['accumulation'] = output.accumulation_method
+    return compiled
+
+def _eval_antecedent(expr, memberships, and_func, or_func):
+    if expr[0] == 'term':
+        return memberships[(expr[1], expr[2])]
+    if expr[0] == 'not':
+        return 1. - _eval_antecedent(expr[1], memberships, and_func, or_func)
+    left = _eval_antecedent(expr[1], memberships, and_func, or_func)
+    right = _eval_antecedent(expr[2], memberships, and_func, or_func)
+    if expr[0] == 'and':
+        return and_func(left, right)
+    return or_func(left, right)
+
+##
+# Returns the centroid of the output membership functions clipped at the
+# activations (cuts, N x number of output terms).
+#
+# Replicates skfuzzy: the universe is upsampled with the points where a term
+# crosses its cut, the clipped terms are combined by maximum and the centroid
+# of the piecewise linear result is accumulated segment by segment. Here the
+# points are collected per interval of the universe (original end points and
+# at most one crossing per term), so all rows are computed at once.
+##
+def _centroid(universe, mfs, cuts):
+    n = len(cuts)
+    x1 = universe[:-1]
+    x2 = universe[1:]
+    m1 = mfs[:, :-1] # (terms x intervals)
+    m2 = mfs[:, 1:]
+    y = cuts[:, :, np.newaxis] # (N x terms x 1)
+
+    # crossings of each term with its cut (cut 0 adds no points)
+    crosses = ((m1 >= y) != (m2 >= y)) & (y != 0.)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        xx = x1 + (y - m1) * (x2 - x1) / (m2 - m1)
+    xx = np.where(crosses, xx, x1) # no crossing: duplicate of the start point
+
+    # points per interval: start, crossings, end (N x intervals x terms+2)
+    points = np.concatenate((np.broadcast_to(x1, (n, 1, len(x1))),
+                             xx, np.broadcast_to(x2, (n, 1, len(x2)))), axis=1)
+    points = np.sort(points.transpose(0, 2, 1), axis=2)
+
+    # output membership at the points (maximum of the clipped terms), the
+    # membership of a term is interpolated like np.interp
+    t = points[:, np.newaxis, :, :] # (N x 1 x intervals x points)
+    slope = ((m2 - m1) / (x2 - x1))[np.newaxis, :, :, np.newaxis]
+    upsampled = slope * (t - x1[:, np.newaxis]) + m1[np.newaxis, :, :, np.newaxis]
+    upsampled = np.where(t == x2[:, np.newaxis], m2[np.newaxis, :, :, np.newaxis], upsampled)
+    out = np.minimum(cuts[:, :, np.newaxis, np.newaxis], upsampled).max(axis=1)
+
+    # centroid, segment by segment (see skfuzzy.defuzzify.centroid)
+    sx1 = points[:, :, :-1].reshape(n, -1)
+    sx2 = points[:, :, 1:].reshape(n, -1)
+    sy1 = out[:, :, :-1].reshape(n, -1)
+    sy2 = out[:, :, 1:].reshape(n, -1)
+    dx = sx2 - sx1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        moment = np.select([sy1 == sy2, sy1 == 0., sy2 == 0.],
+                           [0.5 * (sx1 + sx2),
+                            2.0 / 3.0 * dx + sx1,
+                            1.0 / 3.0 * dx + sx1],
+                           (2.0 / 3.0 * dx * (sy2 + 0.5*sy1)) / (sy1 + sy2) + sx1)
+        area = np.select([sy1 == sy2, sy1 == 0., sy2 == 0.],
+                         [dx * sy1, 0.5 * dx * sy2, 0.5 * dx * sy1],
+                         0.5 * dx * (sy1 + sy2))
+    skip = ((sy1 == 0.) & (sy2 == 0.)) | (dx == 0.)
+    moment_area = np.where(skip, 0., moment * area)
+    area = np.where(skip, 0., area)
+    # accumulate in order like skfuzzy
+    sum_moment_area = np.cumsum(moment_area, axis=1)[:, -1]
+    sum_area = np.cumsum(area, axis=1)[:, -1]
+    score = sum_moment_area / np.fmax(sum_area, np.finfo(float).eps)
+    # no rule fired (skfuzzy raises a ValueError)
+    score[out.sum(axis=(1, 2)) == 0] = np.nan
+    return score
+
+##
+# Vectorized fuzzy evaluation of many input sets.
+#
+# Mamdani inference of the compiled control system (see fuzzy_compile) on an
+# (N x 4) input matrix with columns FUZZY_INPUTS. Returns the N scores, equal
+# to the score of the skfuzzy control system simulation. The score is NaN for
+# inputs activating no rule (the simulation raises an error).
+##
+def fuzzy_batch(inputs, compiled=None):
+    if compiled is None:
+        compiled = fs['compiled']
+    inputs = np.asarray(inputs, dtype=np.float64)
+    if inputs.ndim == 1:
+        inputs = inputs[np.newaxis, :]
+
+    universe, labels, mfs = compiled['output']
+    cuts = _activations(inputs, compiled)
+    return _centroid(universe, mfs, cuts)
+
+##
+# Returns the activations of the output terms (N x number of output terms) of
+# the compiled control system for the inputs (N x 4).
+##
+def _activations(inputs, compiled):
+    # fuzzification (inputs are clipped to the universe, like np.interp does)
+    memberships = {}
+    for i, label in enumerate(FUZZY_INPUTS):
+        universe, terms = compiled['inputs'][label]
+        for term_label, mf in terms.items():
+            memberships[(label, term_label)] = np.interp(inputs[:, i], universe, mf)
+
+    # rules: aggregation, activation and accumulation per output term
+    activations = {}
+    for antecedent, consequents, and_func, or_func in compiled['rules']:
+        firing = _eval_antecedent(antecedent, memberships, and_func, or_func)
+        for label, weight in consequents:
+            value = firing * weight
+            if label in activations:
+                value = compiled['accumulation'](value, activations[label])
+            activations[label] = value
+
+    universe, labels, mfs = compiled['output']
+    return np.column_stack([np.broadcast_to(activations[label], (len(inputs),))
+                            for label in labels])
+
+##
+# Upper bounds of the fuzzy scores of many input sets (see fuzzy_batch).
+#
+# The centroid lies within the support of the activated output terms, so the
+# largest point of the universe where an activated term is positive bounds
+# the score. Only the rules are evaluated (no defuzzification). The bound is
+# 0 if no rule fires.
+##
+def fuzzy_bound(inputs, compiled=None):
+    if compiled is None:
+        compiled = fs['compiled']
+    inputs = np.asarray(inputs, dtype=np.float64)
+    if inputs.ndim == 1:
+        inputs = inputs[np.newaxis, :]
+
+    universe, labels, mfs = compiled['output']
+    support_max = np.array([universe[mf > 0].max() for mf in mfs])
+    cuts = _activations(inputs, compiled)
+    return np.where(cuts > 0, support_max, 0.).max(axis=1)
+
+##
+# Vectorized fuzzy evaluation of a population of genomes (see fastmeasures).
+##
+def fuzzy_population(geometry, genomes, compiled=None):
+    m = fastmeasures.measures_matrix(geometry, genomes)
+    return fuzzy_batch(m[:, FUZZY_MEASURES], compiled)
+
+##
+# Two-stage fuzzy evaluation of the genomes of the genetic algorithm.
+#
+# The fuzzy score of a genome is bounded by its measures first (fuzzy_bound,
+# e.g., any overlap bounds the score by the 'unacceptable' term). Only
+# genomes whose bound reaches the threshold have to be scored fully, the
+# others get their bound. The prescreen bounds and screens populations, the
+# full evaluation is left to the caller (see solver.BatchGA).
+#
+# Use step as step callback of pyevolve, it sets the threshold to the best
+# score of the population. The rank selector of pyevolve (set by
+# solver.ga_engine) selects best individuals only and elitism keeps the best
+# one, so genomes with a lower bound would never be selected and the
+# evolution is not changed. Other selectors are rejected.
+##
+class Prescreen:
+    ##
+    # Constructor
+    ##
+    def __init__(self, geometry, compiled=None):
+        self.geometry = geometry
+        self.compiled = compiled
+        self.threshold = None
+        # number of full evaluations and of genomes scored by their bound
+        self.evaluations = 0
+        self.skipped = 0
+
+    ##
+    # Returns the bounds of the scores of the genomes (see
+    # fastmeasures.as_population) and whether they have to be scored fully
+    # (bound reaches the threshold).
+    ##
+    def screen(self, genomes):
+        m = fastmeasures.measures_matrix(self.geometry, genomes)
+        bounds = fuzzy_bound(m[:, FUZZY_MEASURES], self.compiled)
+        if self.threshold is None:
+            full = np.ones(len(bounds), dtype=bool)
+        else:
+            full = bounds >= self.threshold
+        num_full = int(full.sum())
+        self.evaluations += num_full
+        self.skipped += len(full) - num_full
+        return bounds, full
+
+    def step(self, ga):
+        if [f.__name__ for f in ga.selector] != ['GRankSelector']:
+            raise RuntimeError('Prescreen requires the rank selector, other selectors may select genomes scored by their bound.')
+        self.threshold = ga.bestIndividual().score
+        return False
+
+    ##
+    # Returns the counters as string.
+    ##
+    def summary(self):
+        total = self.evaluations + self.skipped
+        return '%d of %d genomes scored by bound (%.0f%% of the full evaluations saved)' % \
+            (self.skipped, total, 100.0 * self.skipped / max(1, total))
+
 ##
 # Fuzzy evaluation function.
 ##
@@ -248,6 +571,7 @@ def fuzzy(timetable, loglevel=logging.INFO):
     if loglevel == logging.DEBUG:
         fs['score'].view(sim=scoring)
 
-    log.debug(measures.print_measures(timetable))
-    log.debug('score: %.2f' %(scoring.output['score']))
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug(measures.print_measures(timetable))
+    log.debug('score: %.2f', scoring.output['score'])
     return scoring.output['score']
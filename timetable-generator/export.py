@@ -0,0 +1,132 @@
+#!/usr/bin/python
+##
+# @file export.py
+# @date 18.10.2026
+#
+# @brief Output writers for a timetable.
+#
+# All writers work on the run-length encoded schedule of the timetable (see
+# Timetable.get_runs()), i.e., one line/record/event per consecutive block of
+# slots a tutor supervises in a room. The runs are computed once per export
+# and written out line by line.
+#
+
+import csv
+import json
+import os
+import datetime
+
+TIME_FORMAT = '%H:%M'
+ICAL_TIME_FORMAT = '%Y%m%dT%H%M%S'
+
+##
+# Writes the schedule in the format expected by test_timetable.sh.
+#
+# One line 'room,tutor,start,end' per run, rooms are separated by an empty
+# line.
+##
+def write_txt(timetable, runs, filename):
+    a_file = open(filename, 'w')
+    for room, room_runs in runs:
+        for tutor, start, end in room_runs:
+            a_file.write('%s,%s,%s,%s\n' % (room, tutor,
+                                            start.strftime(TIME_FORMAT),
+                                            end.strftime(TIME_FORMAT)))
+        a_file.write('\n')
+    a_file.close()
+
+##
+# Writes the schedule as CSV table with a header line.
+##
+def write_csv(timetable, runs, filename):
+    a_file = open(filename, 'w')
+    writer = csv.writer(a_file, lineterminator='\n')
+    writer.writerow(['room', 'tutor', 'date', 'start', 'end'])
+    for room, room_runs in runs:
+        for tutor, start, end in room_runs:
+            writer.writerow([room, tutor, start.strftime('%Y-%m-%d'),
+                             start.strftime(TIME_FORMAT),
+                             end.strftime(TIME_FORMAT)])
+    a_file.close()
+
+##
+# Writes the schedule as JSON document.
+##
+def write_json(timetable, runs, filename):
+    doc = {
+        'test': timetable.test,
+        'slotlen': timetable.slotlen,
+        'groups': timetable.num_groups,
+        'tutors': timetable.tutors,
+        'rooms': [{'room': room,
+                   'runs': [{'tutor': tutor,
+                             'start': start.isoformat(),
+                             'end': end.isoformat()}
+                            for tutor, start, end in room_runs]}
+                  for room, room_runs in runs],
+    }
+    a_file = open(filename, 'w')
+    json.dump(doc, a_file, indent=2, sort_keys=True)
+    a_file.close()
+
+##
+# Writes one iCalendar file per tutor.
+#
+# The files are named after the given filename with the tutor appended, e.g.,
+# 'schedule.ics' results in 'schedule_<tutor>.ics'. Times are floating local
+# times (no time zone). Returns the list of written files.
+##
+def write_ical(timetable, runs, filename):
+    base, ext = os.path.splitext(filename)
+    if ext == '':
+        ext = '.ics'
+    stamp = datetime.datetime.utcnow().strftime(ICAL_TIME_FORMAT) + 'Z'
+    # collect events per tutor (runs are sorted by room)
+    events = dict((tutor, []) for tutor in timetable.tutors)
+    for room, room_runs in runs:
+        for tutor, start, end in room_runs:
+            events.setdefault(tutor, []).append((room, start, end))
+
+    filenames = []
+    for tutor in timetable.tutors:
+        tutor_filename = '%s_%s%s' % (base, tutor, ext)
+        a_file = open(tutor_filename, 'w')
+        a_file.write('BEGIN:VCALENDAR\r\n'
+                     'VERSION:2.0\r\n'
+                     'PRODID:-//timetable-generator//EN\r\n')
+        for room, start, end in sorted(events[tutor], key=lambda e: e[1]):
+            a_file.write('BEGIN:VEVENT\r\n'
+                         'UID:%s-%s-%s@timetable-generator\r\n'
+                         'DTSTAMP:%s\r\n'
+                         'DTSTART:%s\r\n'
+                         'DTEND:%s\r\n'
+                         'SUMMARY:Test %d supervision (%s)\r\n'
+                         'LOCATION:%s\r\n'
+                         'END:VEVENT\r\n' % (start.strftime(ICAL_TIME_FORMAT), room, tutor,
+                                             stamp,
+                                             start.strftime(ICAL_TIME_FORMAT),
+                                             end.strftime(ICAL_TIME_FORMAT),
+                                             timetable.test, room,
+                                             room))
+        a_file.write('END:VCALENDAR\r\n')
+        a_file.close()
+        filenames.append(tutor_filename)
+    return filenames
+
+##
+# Pool of output writers.
+##
+writers = {
+    'txt': write_txt,
+    'csv': write_csv,
+    'json': write_json,
+    'ics': write_ical,
+}
+
+##
+# Writes the schedule of a timetable to a file in the given format.
+##
+def export(timetable, filename, fmt='txt'):
+    if fmt not in writers:
+        raise RuntimeError('Unknown output format %s, choose one of %s.' % (fmt, sorted(writers.keys())))
+    return writers[fmt](timetable, timetable.get_runs(), filename)
@@ -0,0 +1,277 @@
+#!/usr/bin/python
+##
+# @file fastmeasures.py
+# @date 18.10.2026
+#
+# @brief Vectorized measures of a population of genomes.
+#
+# Computes the measures of measures.py for many genomes at once. A genome is
+# a sequence of tutor indices, one per slot of the timetable (in the order of
+# Timetable.get_slots()); a population is an (N x number of slots) integer
+# matrix. The shape of the timetable (room and column of each slot) is
+# extracted once into a Geometry object. Populations are stored with the
+# smallest unsigned type holding all tutor indices (Geometry.dtype, 1 byte
+# per gene for up to 256 tutors), the measures convert them to indices.
+#
+# The column of a slot in the slot matrix of the timetable corresponds to its
+# start time. Like measures.py, time based measures use the start time of a
+# column in minutes since midnight of the first day of the test, so tests
+# may run past midnight.
+#
+# Availability and room preferences of the tutors (constraints.py) are
+# compiled into a feasibility bitmask per slot (bit t set if tutor t is
+# available) and a penalty matrix (slot x tutor) of room preference
+# violations. Genomes are sampled from the feasible tutors of each slot only,
+# so optimization never produces unavailable assignments. Tutors available
+# for less than their share of the slots are balanced against the others by
+# offsets (see measures.get_balance).
+#
+
+import copy
+import datetime
+import numpy as np
+
+# columns of the measures matrix
+OVERLAPS = 0
+SLOTDIFF = 1
+TESTDIFF = 2
+RCHANGES = 3
+HOLES = 4
+RPREFS = 5
+NUM_MEASURES = 6
+
+MEASURE_NAMES = ['overlaps', 'slotdiff', 'testdiff', 'rchanges', 'holes', 'rprefs']
+
+##
+# Returns the smallest unsigned integer type for the genes of num_tutors
+# tutors.
+##
+def genome_dtype(num_tutors):
+    if num_tutors <= 1 << 8:
+        return np.uint8
+    return np.uint16
+
+##
+# Shape of a timetable needed to evaluate genomes.
+##
+class Geometry:
+    ##
+    # Constructor
+    #
+    # Extracts room (row) and column of each slot of the timetable and
+    # compiles the constraints of the tutors.
+    ##
+    def __init__(self, timetable):
+        index = dict((id(s), i) for i, s in enumerate(timetable.get_slots()))
+        self.num_slots = len(index)
+        self.num_tutors = len(timetable.tutors)
+        self.num_rooms = len(timetable.rooms)
+        self.num_cols = len(timetable._slot_matrix[0])
+        self.slotlen = timetable.slotlen
+        self.dtype = genome_dtype(self.num_tutors)
+
+        self.rows = np.zeros(self.num_slots, dtype=np.intp)
+        self.cols = np.zeros(self.num_slots, dtype=np.intp)
+        # start time of each column in minutes since midnight of the first day
+        day = datetime.datetime.combine(min(s.start for s in timetable.get_slots()).date(),
+                                        datetime.time())
+        self.col_minutes = np.zeros(self.num_cols, dtype=np.int64)
+        left = []
+        right = []
+        for r, row in enumerate(timetable._slot_matrix):
+            for c, slot in enumerate(row):
+                if slot == None:
+                    continue
+                i = index[id(slot)]
+                self.rows[i] = r
+                self.cols[i] = c
+                delta = slot.start - day
+                self.col_minutes[c] = delta.days*24*60 + delta.seconds//60
+                # horizontally adjacent slots (tutor may change between them)
+                if c+1 < len(row) and row[c+1] != None:
+                    left.append(i)
+                    right.append(index[id(row[c+1])])
+        self.left = np.array(left, dtype=np.intp)
+        self.right = np.array(right, dtype=np.intp)
+        # measures.get_concurrent_slots searches the start time in the first
+        # room only, so overlaps are counted in these columns only
+        self.overlap_cols = np.array([s != None for s in timetable._slot_matrix[0]])
+        self._compile_constraints(timetable)
+
+    def _compile_constraints(self, timetable):
+        c = timetable.constraints
+        slots = timetable.get_slots()
+        # room preferences are rated only if a tutor has preferred rooms
+        self.has_room_preferences = c != None and len(c.rooms) > 0
+        # feasible[i,t] is true if tutor t is available for slot i
+        self.feasible = np.ones((self.num_slots, self.num_tutors), dtype=bool)
+        self.penalty = np.zeros((self.num_slots, self.num_tutors), dtype=np.int64)
+        if c != None:
+            for t, tutor in enumerate(timetable.tutors):
+                self.feasible[:, t] = [c.is_available(tutor, s.start, self.slotlen) for s in slots]
+                self.penalty[:, t] = [not c.prefers(tutor, timetable.rooms[r]) for r in self.rows]
+        self.constrained = not self.feasible.all()
+        num_options = self.feasible.sum(axis=1)
+        if (num_options == 0).any():
+            i = np.flatnonzero(num_options == 0)[0]
+            raise RuntimeError('No tutor available for slot at %s.' % (slots[i].start))
+        # bitset of the feasible tutors of each slot
+        self.masks = [sum(1 << t for t in np.flatnonzero(f).tolist()) for f in self.feasible]
+        # feasible tutors of each slot first (stable), number of feasible
+        # tutors; random feasible tutor: options[i, randint(num_options[i])]
+        self.options = np.argsort(~self.feasible, axis=1, kind='mergesort')
+        self.num_options = num_options
+        self._compile_balance()
+
+    ##
+    # Computes the balance offsets of the number of slots of each tutor and
+    # the tutors whose test length is balanced (see measures.get_balance).
+    ##
+    def _compile_balance(self):
+        # available slots of each tutor per column (1 x tutors x columns)
+        available = np.zeros((self.num_cols, self.num_tutors), dtype=np.int64)
+        np.add.at(available, self.cols, self.feasible)
+        max_testlen, capacity = tutor_spans(self, available.T[np.newaxis])
+        max_testlen = max_testlen[0]
+        # maximum number of slots of each tutor without overlaps
+        self.capacity = capacity = capacity[0]
+        if capacity.sum() < self.num_slots:
+            # overlaps unavoidable
+            share = capacity.max()
+        else:
+            share = self.num_slots // self.num_tutors
+            while np.minimum(capacity, share).sum() < self.num_slots:
+                share += 1
+        self.slot_offsets = np.maximum(0, share - capacity)
+        self.testlen_balanced = max_testlen >= share
+
+    ##
+    # Returns true if tutor t is available for slot i.
+    ##
+    def is_feasible(self, i, t):
+        return (self.masks[i] >> t) & 1 == 1
+
+    ##
+    # Returns the geometry of the columns first, ..., last-1 (a timetable of
+    # the slots in these columns only) and the indices of these slots in this
+    # geometry.
+    ##
+    def window(self, first, last):
+        slots = np.flatnonzero((self.cols >= first) & (self.cols < last))
+        index = np.full(self.num_slots, -1, dtype=np.intp)
+        index[slots] = np.arange(len(slots))
+        w = copy.copy(self)
+        w.num_slots = len(slots)
+        w.num_cols = last - first
+        w.rows = self.rows[slots]
+        w.cols = self.cols[slots] - first
+        w.col_minutes = self.col_minutes[first:last]
+        inner = (index[self.left] >= 0) & (index[self.right] >= 0)
+        w.left = index[self.left[inner]]
+        w.right = index[self.right[inner]]
+        w.overlap_cols = self.overlap_cols[first:last]
+        w.feasible = self.feasible[slots]
+        w.penalty = self.penalty[slots]
+        w.masks = [self.masks[i] for i in slots.tolist()]
+        w.options = self.options[slots]
+        w.num_options = self.num_options[slots]
+        w._compile_balance()
+        return w, slots
+
+##
+# Returns the genomes as 2-dimensional integer matrix (a single genome is
+# converted to a population of size 1).
+##
+def as_population(genomes):
+    genomes = np.asarray(genomes, dtype=np.intp)
+    if genomes.ndim == 1:
+        genomes = genomes[np.newaxis, :]
+    return genomes
+
+##
+# Returns n random genomes (n x number of slots, Geometry.dtype) assigning an
+# available tutor (uniformly) to each slot. rng is a numpy.random.RandomState.
+##
+def random_genomes(geometry, n, rng=np.random):
+    choice = (rng.random_sample((n, geometry.num_slots)) * geometry.num_options).astype(np.intp)
+    return geometry.options[np.arange(geometry.num_slots), choice].astype(geometry.dtype)
+
+##
+# Returns for each genome if all tutors are available for their slots.
+##
+def feasible(geometry, genomes):
+    genomes = as_population(genomes)
+    return geometry.feasible[np.arange(geometry.num_slots), genomes].all(axis=1)
+
+##
+# Returns the number of slots of each tutor (N x number of tutors).
+##
+def count_slots(geometry, genomes):
+    genomes = as_population(genomes)
+    n = len(genomes)
+    idx = genomes + geometry.num_tutors * np.arange(n)[:, np.newaxis]
+    cnt = np.bincount(idx.ravel(), minlength=n*geometry.num_tutors)
+    return cnt.reshape(n, geometry.num_tutors)
+
+##
+# Returns the number of slots of each tutor in each column (N x number of
+# tutors x number of columns).
+##
+def count_column_slots(geometry, genomes):
+    genomes = as_population(genomes)
+    n = len(genomes)
+    cells = geometry.num_tutors * geometry.num_cols
+    idx = genomes * geometry.num_cols + geometry.cols[np.newaxis, :] \
+          + cells * np.arange(n)[:, np.newaxis]
+    cnt = np.bincount(idx.ravel(), minlength=n*cells)
+    return cnt.reshape(n, geometry.num_tutors, geometry.num_cols)
+
+##
+# Returns sum over all pairs i < j of |values[:,i] - values[:,j]| for each
+# row of values.
+##
+def sum_up_pairwise_differences(values):
+    values = np.sort(values, axis=1)
+    k = values.shape[1]
+    factors = 2*np.arange(k) - (k-1)
+    return (values * factors).sum(axis=1)
+
+##
+# Returns the test length (in slots, see measures.get_test_length_for_tutor)
+# and the number of occupied columns of each tutor (each N x number of
+# tutors).
+##
+def tutor_spans(geometry, column_slots):
+    present = column_slots > 0
+    minutes = geometry.col_minutes[np.newaxis, np.newaxis, :]
+    first = np.where(present, minutes, np.iinfo(np.int64).max).min(axis=2)
+    last = np.where(present, minutes, -1).max(axis=2)
+    testlen = np.where(last >= 0, (last - first) // geometry.slotlen + 1, 0)
+    return testlen, present.sum(axis=2)
+
+##
+# Returns the measures matrix of a population (N x NUM_MEASURES).
+#
+# The slot differences include the balance offsets of the tutors
+# (Geometry.slot_offsets), the test length differences the tutors whose test
+# length is balanced only (Geometry.testlen_balanced).
+#
+# Matches count_overlaps, sum_up_slot_differences,
+# sum_up_testlength_differences, count_room_changes, count_tutor_holes and
+# count_room_preference_violations of measures.py.
+##
+def measures_matrix(geometry, genomes):
+    genomes = as_population(genomes)
+    m = np.zeros((len(genomes), NUM_MEASURES), dtype=np.int64)
+
+    column_slots = count_column_slots(geometry, genomes)
+    testlen, distinct = tutor_spans(geometry, column_slots)
+
+    overlapping = column_slots[:, :, geometry.overlap_cols]
+    m[:, OVERLAPS] = np.where(overlapping > 1, overlapping, 0).sum(axis=(1, 2))
+    m[:, SLOTDIFF] = sum_up_pairwise_differences(column_slots.sum(axis=2) + geometry.slot_offsets)
+    m[:, TESTDIFF] = sum_up_pairwise_differences(testlen[:, geometry.testlen_balanced])
+    m[:, RCHANGES] = (genomes[:, geometry.left] != genomes[:, geometry.right]).sum(axis=1)
+    m[:, HOLES] = (testlen - distinct).sum(axis=1)
+    m[:, RPREFS] = geometry.penalty[np.arange(geometry.num_slots), genomes].sum(axis=1)
+    return m
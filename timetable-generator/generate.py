@@ -23,11 +23,19 @@ import logging
 import datetime
 import random
 import math
+import os
 import re
-from pyevolve import G1DList, GSimpleGA
-
+import numpy as np
 from timetable import Slot, Timetable
+import constraints
+import decomposition
 import evaluation
+import export
+import fastmeasures
+import localsearch
+import nsga2
+import seeding
+import solver
 
 
 ####################
@@ -46,12 +54,29 @@ eval_func_dict = {
 }
 eval_func_str = 'fuzzy' # default evaluation function
 
+# optimization modes: single objective genetic algorithm (pyevolve),
+# multi-objective optimization of the measures (NSGA-II) returning a Pareto
+# front of schedules or decomposition into time windows (large tests)
+modes = ['ga', 'nsga2', 'decompose']
+mode_str = 'ga' # default mode
+
 log_formatter = logging.Formatter('[%(levelname)s][%(name)s] %(message)s')
 
 OUTPUT_FILENAME = 'test_timetable_schedule.txt'
+OUTPUT_FORMAT = 'txt' # default output format (input of test_timetable.sh)
 
 # number of generations of evolutionary algorithm
-GENERATIONS = 100
+GENERATIONS = solver.GENERATIONS
+
+# number of individuals (default of pyevolve)
+POPULATION_SIZE = solver.POPULATION_SIZE
+
+# budget of the refinement of the best schedule by local search (simulated
+# annealing), 0 disables the refinement
+REFINE_ITERATIONS = localsearch.ITERATIONS
+
+# number of schedules of the Pareto front written to files (mode nsga2)
+PARETO_FILES = 5
 
 
 ##########
@@ -79,11 +104,65 @@ parser.add_argument('start', type=str,
                     help='Start time and date of the test. Specify in format d.m.Y H:M, e.g., 22.01.2016 08:00.')
 parser.add_argument('tutors', type=str, nargs='*', metavar='tutor', default=tutors,
                     help='Names of the tutors. Default tutors: ' + str(tutors))
+parser.add_argument('-c', '--config', type=str, default=None,
+                    help='Session configuration (JSON) with availability windows and preferred ' \
+                    'rooms of the tutors (see constraints.py), default: none. Preferred rooms are ' \
+                    'rated by -O piecewise_linear only.')
 parser.add_argument('-O', '--optimize', type=str, 
                     choices=['piecewise_linear', 'fuzzy'], default=eval_func_str,
-                    help='Evaluation function of optimization, default: ' + eval_func_str)
+                    help='Evaluation function of optimization, default: ' + eval_func_str + \
+                    '. In mode nsga2 used to pick the schedule written to the output file.')
+parser.add_argument('-m', '--mode', type=str, choices=modes, default=mode_str,
+                    help='Optimization mode, default: ' + mode_str + \
+                    '. Mode nsga2 also writes the best schedules of the Pareto front to separate ' \
+                    'files (see -p).')
+parser.add_argument('-w', '--window', type=int, default=decomposition.WINDOW,
+                    help='Width of the time windows in slots (mode decompose), default: ' + \
+                    str(decomposition.WINDOW))
+parser.add_argument('-j', '--jobs', type=int, default=1,
+                    help='Number of processes refining time windows (mode decompose), scoring the ' \
+                    'generations (mode ga) or computing the measures of the offspring (mode nsga2), ' \
+                    'default: 1')
+parser.add_argument('-p', '--pareto-files', type=int, default=PARETO_FILES,
+                    help='Number of schedules of the Pareto front with distinct measures written to ' \
+                    'separate files, best by the evaluation function first (mode nsga2), ' \
+                    'default: ' + str(PARETO_FILES))
+parser.add_argument('-s', '--seed-ratio', type=float, default=seeding.SEED_RATIO,
+                    help='Fraction of the initial population built by constructive heuristics ' \
+                    '(the rest is random), default: ' + str(seeding.SEED_RATIO))
+parser.add_argument('-a', '--adaptive', action='store_true',
+                    help='Adapt the operator probabilities and the mutation rate during the ' \
+                    'evolution (mode ga), default: fixed operators.')
+parser.add_argument('--no-prescreen', action='store_true',
+                    help='Score every genome by the full fuzzy evaluation (mode ga), default: ' \
+                    'genomes whose measures bound their score below the best score are not ' \
+                    'scored fully (same result).')
+parser.add_argument('-r', '--refine', type=int, default=REFINE_ITERATIONS,
+                    help='Maximum number of local search moves refining the optimized schedule ' \
+                    '(mode decompose: repairing the stitched windows), 0 disables refinement, ' \
+                    'a negative number sets no move limit (requires --refine-time), ' \
+                    'default: ' + str(REFINE_ITERATIONS))
+parser.add_argument('--refine-time', type=float, default=None,
+                    help='Maximum time in seconds for the refinement, default: unlimited.')
+parser.add_argument('-o', '--output', type=str, default=OUTPUT_FILENAME,
+                    help='Output file of the schedule, default: ' + OUTPUT_FILENAME)
+parser.add_argument('-f', '--format', type=str,
+                    choices=sorted(export.writers.keys()), default=OUTPUT_FORMAT,
+                    help='Format of the output file, default: ' + OUTPUT_FORMAT + \
+                    '. Format ics writes one iCalendar file per tutor.')
 args = parser.parse_args()
 
+if args.seed_ratio < 0 or args.seed_ratio > 1:
+   parser.error('Seed ratio must be in [0,1].')
+if args.adaptive and args.mode != 'ga':
+   parser.error('Adaptive operators (-a) are only available in mode ga.')
+# maximum number of refinement moves, None: no limit (time limit only)
+refine_iterations = args.refine
+if args.refine < 0:
+   if args.refine_time == None:
+      parser.error('No move limit for the refinement (-r < 0) requires --refine-time.')
+   refine_iterations = None
+
 start = datetime.datetime.strptime(args.start, '%d.%m.%Y %H:%M')
 
 # only lab rooms, i.e., rooms supervised by tutors
@@ -102,11 +181,22 @@ if len(args.tutors) < len(rooms):
 
 tutors = args.tutors
 
+# availability and room preferences of the tutors
+tutor_constraints = None
+if args.config is not None:
+   tutor_constraints = constraints.load(args.config, tutors, rooms)
+   # the fuzzy rule base has no input for room preferences
+   if tutor_constraints.rooms and args.optimize == 'fuzzy':
+      parser.error('Preferred rooms of the session configuration are not rated by -O fuzzy, ' \
+                   'use -O piecewise_linear.')
+
 eval_func_str = args.optimize
 
 log.debug('config: %d. Test (in lab rooms) starts at %s.' % (args.test, start.strftime('%H:%M')))
 log.debug('config: %d groups of students, %d rooms for computertest.' % (args.groups, len(rooms)))
 log.debug('config: evaluation function of genetic optimization = %s' % (eval_func_str))
+log.debug('config: optimization mode = %s' % (args.mode))
+log.debug('config: session configuration = %s' % (args.config))
 
 
 #
@@ -114,7 +204,8 @@ log.debug('config: evaluation function of genetic optimization = %s' % (eval_fun
 #
 
 # Collects data about timetable.
-t = Timetable(start, args.test, rooms, tutors, args.groups)
+t = Timetable(start, args.test, rooms, tutors, args.groups, tutor_constraints)
+geometry = fastmeasures.Geometry(t)
 
 # Initialize evaluation functions if necessary.
 if eval_func_str == 'fuzzy':
@@ -142,44 +233,123 @@ def apply_genome(genome):
 def eval_func(chromosome):
    # map chromosome (a generated schedule) to the timetable
    apply_genome(chromosome)
+   # no fuzzy rule fires for some measures (gaps of the rule base, e.g.,
+   # average slot difference with good test length difference), skfuzzy
+   # cannot compute a score then, worst score
+   if eval_func_str == 'fuzzy' and math.isnan(evaluation.fuzzy_population(geometry, chromosome)[0]):
+      return 0.0
    # evaluate score of the timetable
    score = eval_func_dict[eval_func_str](t, log.getEffectiveLevel())
    return score
 
-
-# genome instance (first one)
-genome = G1DList.G1DList(len(t.get_slots()))
-genome.evaluator.set(eval_func)
-genome.setParams(rangemin=0, rangemax=len(tutors)-1)
-
-# create GA engine
-ga = GSimpleGA.GSimpleGA(genome)
-ga.initialize()
-ga.setGenerations(GENERATIONS)
-
-# do the evolution, with stats dump frequency of 10 generations
-log.setLevel(logging.INFO)
-ga.evolve(freq_stats=10)
-log.setLevel(logging.DEBUG)
-
-# # just test eval function
-# genome = ga.getPopulation()[0]
-# apply_genome(genome)
+##
+# Evaluation function of a population (genome matrix), scores of eval_func.
+##
+def eval_population(genomes):
+   if eval_func_str == 'fuzzy':
+      # worst score if no fuzzy rule fires (see eval_func)
+      return np.nan_to_num(evaluation.fuzzy_population(geometry, genomes))
+   return evaluation.piecewise_population(geometry, genomes)
+
+# local search minimizes the cost of the selected evaluation function
+refine_objective = None
+if eval_func_str == 'fuzzy':
+   refine_objective = localsearch.fuzzy_cost()
+
+
+if args.mode == 'nsga2':
+   # evolve Pareto front, with stats dump frequency of 10 generations
+   seeds = seeding.seed_genomes(geometry, int(round(POPULATION_SIZE * args.seed_ratio)))
+   front, objectives = nsga2.evolve(geometry, GENERATIONS, POPULATION_SIZE,
+                                    freq_stats=10, seeds=seeds, processes=args.jobs)
+
+   # rank schedules of the front with the evaluation function
+   log.setLevel(logging.INFO)
+   scores = [eval_func(list(g)) for g in front]
+   log.setLevel(logging.DEBUG)
+   order = sorted(range(len(front)), key=lambda i: -scores[i])
+
+   # write the best schedules, one per trade-off (schedules with equal
+   # measures are equivalent)
+   print 'Pareto front (%d schedules):' % (len(front))
+   print '  # | ' + ' | '.join('%8s' % (m) for m in fastmeasures.MEASURE_NAMES) + ' | score | file'
+   base, ext = os.path.splitext(args.output)
+   written = set()
+   for rank, i in enumerate(order):
+      filename = ''
+      key = tuple(objectives[i])
+      if len(written) < args.pareto_files and key not in written:
+         written.add(key)
+         filename = '%s_pareto%d%s' % (base, len(written) - 1, ext)
+         apply_genome(list(front[i]))
+         t.print_timetable(filename, args.format)
+      print '%3d | ' % (rank) + ' | '.join('%8d' % (m) for m in objectives[i]) + \
+         ' | %5.2f | %s' % (scores[i], filename)
+   best = list(front[order[0]])
+elif args.mode == 'decompose':
+   # the final local search of the decomposition repairs the window borders
+   # and refines the schedule (no further refinement below)
+   overlap = min(decomposition.OVERLAP, args.window // 2)
+   best, best_measures = decomposition.solve(geometry, args.window, overlap,
+                                             repair_iterations=refine_iterations,
+                                             time_limit=args.refine_time,
+                                             processes=args.jobs,
+                                             objective=refine_objective)
+else:
+   # two-stage fuzzy evaluation: bound by the measures, full evaluation of
+   # genomes which may become best
+   prescreen = None
+   if eval_func_str == 'fuzzy' and not args.no_prescreen:
+      prescreen = evaluation.Prescreen(geometry)
+
+   # create GA engine, scoring each generation at once
+   ga = solver.ga_engine(geometry, eval_func, GENERATIONS, POPULATION_SIZE,
+                         seed_ratio=args.seed_ratio, adaptive=args.adaptive,
+                         score_func=eval_population, processes=args.jobs,
+                         prescreen=prescreen)
+
+   # do the evolution, with stats dump frequency of 10 generations
+   log.setLevel(logging.INFO)
+   ga.evolve(freq_stats=10)
+   log.setLevel(logging.DEBUG)
+   if ga.adaptive != None:
+      log.info('Adaptive operators: mutation rate %.4f, diversity %.3f, %s' % \
+               (ga.pMutation, ga.adaptive.diversity, ga.adaptive.summary()))
+   if prescreen != None:
+      log.info('Prescreen: %s' % (prescreen.summary()))
+
+   # # just test eval function
+   # genome = ga.getPopulation()[0]
+   # apply_genome(genome)
+
+   best = ga.bestIndividual()
+
+# refine the schedule by local search, keep it if the score improved
+if args.refine != 0 and args.mode != 'decompose':
+   log.setLevel(logging.INFO)
+   refined, refined_measures = localsearch.refine(geometry, list(best), refine_iterations,
+                                                  time_limit=args.refine_time,
+                                                  objective=refine_objective)
+   best_score = eval_func(list(best))
+   refined_score = eval_func(refined)
+   log.setLevel(logging.DEBUG)
+   log.info('Refinement: score %.2f -> %.2f' % (best_score, refined_score))
+   if refined_score > best_score:
+      best = refined
 
 
 #
 # Print results
 #
-best = ga.bestIndividual()
 apply_genome(best)
 print t
 eval_func(best)
 
-t.print_timetable(OUTPUT_FILENAME)
+t.print_timetable(args.output, args.format)
 
 # print info for next steps
 print '**********************************************************'
-print 'Complete ' + OUTPUT_FILENAME + ' if necessary.'
+print 'Complete ' + args.output + ' if necessary.'
 print 'Print PDF of schedule with:'
 if args.test == 1:
    room_nr = re.findall(r'\d+', rooms[0])[0]
@@ -188,7 +358,7 @@ elif args.test == 2:
 print './test_timetable.sh ' + str(args.test) + ' "' + \
    start.strftime('%H:%M') + '" ' + \
    str(args.groups) + ' ' + \
-   room_nr + ' ' + OUTPUT_FILENAME
+   room_nr + ' ' + args.output
 print '**********************************************************'
 
 if log.getEffectiveLevel() == logging.DEBUG:
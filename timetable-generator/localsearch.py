@@ -0,0 +1,305 @@
+#!/usr/bin/python
+##
+# @file localsearch.py
+# @date 18.10.2026
+#
+# @brief Local search refinement of a genome (simulated annealing).
+#
+# Polishes the best genome of an optimization run with cheap moves: a point
+# move assigns another tutor to a slot, a swap exchanges the tutors of two
+# slots and a block move reassigns a contiguous run of slots in a room to
+# another tutor. The measures are updated incrementally per changed slot, so a
+# move costs O(number of tutors) instead of a full evaluation. Moves assign
+# available tutors only (see fastmeasures.Geometry.masks).
+#
+# The cost minimized is the weighted sum of the measures used by
+# evaluation.piecewise_linear by default, i.e., minimizing the cost maximizes
+# the piecewise linear score. Another objective of the measures can be given,
+# e.g., the negated fuzzy score (fuzzy_cost).
+#
+
+import logging
+import math
+import random
+import time
+
+import evaluation
+import fastmeasures
+
+# default parameters of the refinement
+ITERATIONS = 20000
+MAX_BLOCK = 8 # maximum number of slots reassigned by a block move
+MOVES = ['point', 'swap', 'block']
+# probability to accept an average worsening move at the start
+P0 = 0.05
+
+##
+# Returns the weights of the measures (see evaluation.piecewise_coefficients),
+# i.e., minimizing the cost maximizes the piecewise linear score.
+##
+def cost_weights(geometry, weights=None):
+    return evaluation.piecewise_coefficients(geometry, weights)[1]
+
+##
+# Returns an objective (cost of a measures vector) minimizing which maximizes
+# the fuzzy score (see evaluation.fuzzy_batch). Measures no rule fires for
+# cost 0 (worst score). The scores are cached per input set of the fuzzy
+# system, moves often lead to the same measures.
+##
+def fuzzy_cost(compiled=None):
+    cache = {}
+    def cost(m):
+        inputs = tuple(m[i] for i in evaluation.FUZZY_MEASURES)
+        if inputs not in cache:
+            score = evaluation.fuzzy_batch([inputs], compiled)[0]
+            cache[inputs] = 0.0 if math.isnan(score) else -score
+        return cache[inputs]
+    return cost
+
+##
+# Returns sum over all pairs i < j of |values[i] - values[j]|.
+##
+def _pairwise_differences(values):
+    values = sorted(values)
+    k = len(values)
+    return sum(v * (2*i - (k-1)) for i, v in enumerate(values))
+
+##
+# Genome with incrementally maintained measures.
+##
+class State:
+    ##
+    # Constructor
+    #
+    # The cost is the objective of the measures if given, the weighted sum
+    # otherwise.
+    ##
+    def __init__(self, geometry, genome, weights=None, objective=None):
+        self.geometry = geometry
+        if weights is None:
+            weights = cost_weights(geometry)
+        self.weights = [float(w) for w in weights]
+        self.objective = objective
+        num_tutors = geometry.num_tutors
+        self.cols = geometry.cols.tolist()
+        self.minutes = geometry.col_minutes.tolist()
+        self.overlap_cols = geometry.overlap_cols.tolist()
+        self.penalty = geometry.penalty.tolist()
+        # tutors whose test length is balanced (None if all)
+        self.testlen_balanced = None
+        if not geometry.testlen_balanced.all():
+            self.testlen_balanced = geometry.testlen_balanced.tolist()
+        # available tutors of each slot
+        self.options = [o[:n] for o, n in zip(geometry.options.tolist(), geometry.num_options.tolist())]
+        # neighbors of each slot in its room (-1 if none)
+        self.prev = [-1] * geometry.num_slots
+        self.next = [-1] * geometry.num_slots
+        for l, r in zip(geometry.left.tolist(), geometry.right.tolist()):
+            self.next[l] = r
+            self.prev[r] = l
+
+        self.genome = [int(x) for x in genome]
+        # number of slots of each tutor plus its balance offset
+        self.counts = geometry.slot_offsets.tolist()
+        self.occ = [[0] * geometry.num_cols for x in range(num_tutors)]
+        self.distinct = [0] * num_tutors
+        self.first = [None] * num_tutors # earliest minute of day of a tutor
+        self.last = [None] * num_tutors # latest minute of day of a tutor
+        self.overlaps = 0
+        self.rprefs = 0
+        for i, t in enumerate(self.genome):
+            self._add(i, t)
+        self.rchanges = sum(1 for i in range(len(self.genome))
+                            if self.next[i] >= 0 and self.genome[i] != self.genome[self.next[i]])
+
+    def _add(self, i, t):
+        c = self.cols[i]
+        o = self.occ[t][c]
+        if self.overlap_cols[c] and o > 0:
+            self.overlaps += 2 if o == 1 else 1
+        self.occ[t][c] = o + 1
+        self.counts[t] += 1
+        self.rprefs += self.penalty[i][t]
+        if o == 0:
+            self.distinct[t] += 1
+            m = self.minutes[c]
+            if self.first[t] is None or m < self.first[t]:
+                self.first[t] = m
+            if self.last[t] is None or m > self.last[t]:
+                self.last[t] = m
+
+    def _remove(self, i, t):
+        c = self.cols[i]
+        o = self.occ[t][c]
+        if self.overlap_cols[c] and o > 1:
+            self.overlaps -= 2 if o == 2 else 1
+        self.occ[t][c] = o - 1
+        self.counts[t] -= 1
+        self.rprefs -= self.penalty[i][t]
+        if o == 1:
+            self.distinct[t] -= 1
+            m = self.minutes[c]
+            if m == self.first[t] or m == self.last[t]:
+                # boundary of the tutor's test time changed, rescan
+                occupied = [self.minutes[x] for x, n in enumerate(self.occ[t]) if n > 0]
+                self.first[t] = min(occupied) if occupied else None
+                self.last[t] = max(occupied) if occupied else None
+
+    ##
+    # Assigns tutor t to slot i. Returns the previous tutor.
+    ##
+    def set(self, i, t):
+        old = self.genome[i]
+        if old == t:
+            return old
+        for nb in (self.prev[i], self.next[i]):
+            if nb >= 0:
+                self.rchanges += (self.genome[nb] != t) - (self.genome[nb] != old)
+        self._remove(i, old)
+        self._add(i, t)
+        self.genome[i] = t
+        return old
+
+    ##
+    # Returns the measures vector (see fastmeasures.measures_matrix).
+    ##
+    def measures(self):
+        slotlen = self.geometry.slotlen
+        testlen = [(l - f) // slotlen + 1 if f is not None else 0
+                   for f, l in zip(self.first, self.last)]
+        m = [0] * fastmeasures.NUM_MEASURES
+        m[fastmeasures.OVERLAPS] = self.overlaps
+        m[fastmeasures.SLOTDIFF] = _pairwise_differences(self.counts)
+        if self.testlen_balanced is None:
+            m[fastmeasures.TESTDIFF] = _pairwise_differences(testlen)
+        else:
+            m[fastmeasures.TESTDIFF] = _pairwise_differences(
+                [l for l, b in zip(testlen, self.testlen_balanced) if b])
+        m[fastmeasures.RCHANGES] = self.rchanges
+        m[fastmeasures.HOLES] = sum(testlen) - sum(self.distinct)
+        m[fastmeasures.RPREFS] = self.rprefs
+        return m
+
+    ##
+    # Returns the cost of the measures (objective or weighted sum).
+    ##
+    def cost(self):
+        if self.objective is not None:
+            return self.objective(self.measures())
+        return sum(w * m for w, m in zip(self.weights, self.measures()))
+
+##
+# Applies a random move to the state. Returns the list of (slot, previous
+# tutor) changes to undo the move.
+#
+# Only the slots in 'slots' are changed (all slots if None); movable[i] is
+# true for these slots. Tutors are assigned to slots they are available for
+# only, a swap of tutors not available for the other slot is void (no
+# changes).
+##
+def random_move(state, rng, max_block=MAX_BLOCK, slots=None, movable=None):
+    options = state.options
+    is_feasible = state.geometry.is_feasible
+    move = rng.choice(MOVES)
+    if slots is None:
+        i = rng.randrange(len(state.genome))
+    else:
+        i = rng.choice(slots)
+    if move == 'swap':
+        j = rng.randrange(len(state.genome)) if slots is None else rng.choice(slots)
+        ti = state.genome[i]
+        tj = state.genome[j]
+        if not (is_feasible(i, tj) and is_feasible(j, ti)):
+            return []
+        return [(i, state.set(i, tj)), (j, state.set(j, ti))]
+    if move == 'block':
+        # continue the run of the previous slot in the room or take a random
+        # tutor
+        if state.prev[i] >= 0 and rng.random() < 0.5 \
+           and is_feasible(i, state.genome[state.prev[i]]):
+            t = state.genome[state.prev[i]]
+        else:
+            t = rng.choice(options[i])
+        changes = []
+        for x in range(rng.randint(1, max_block)):
+            changes.append((i, state.set(i, t)))
+            i = state.next[i]
+            if i < 0 or (movable is not None and not movable[i]) or not is_feasible(i, t):
+                break
+        return changes
+    return [(i, state.set(i, rng.choice(options[i])))]
+
+##
+# Reverts the changes of a move.
+##
+def undo(state, changes):
+    for i, t in reversed(changes):
+        state.set(i, t)
+
+##
+# Refines a genome by simulated annealing.
+#
+# Runs at most 'iterations' moves (no limit if None) and, if given, at most
+# time_limit seconds (one of both is required). The temperature decreases
+# geometrically over the budget, starting from a
+# temperature where an average worsening move is accepted with probability
+# p0 (default P0, low, the genome to refine is already good). Only the slots
+# given in 'slots' (indices) are changed, if set. The cost is the weighted
+# sum of the measures or the objective (see State). Returns the best genome
+# found (list of tutor indices) and its measures.
+##
+def refine(geometry, genome, iterations=ITERATIONS, time_limit=None,
+           seed=None, weights=None, slots=None, objective=None, p0=P0):
+    log = logging.getLogger("localsearch")
+    if iterations is None and time_limit is None:
+        raise RuntimeError('Refinement requires a number of iterations or a time limit.')
+    rng = random.Random(seed)
+    state = State(geometry, genome, weights, objective)
+    current = initial = state.cost()
+    movable = None
+    if slots is not None:
+        slots = [int(i) for i in slots]
+        movable = [False] * geometry.num_slots
+        for i in slots:
+            movable[i] = True
+
+    # initial temperature from random moves
+    uphill = []
+    for x in range(100):
+        changes = random_move(state, rng, slots=slots, movable=movable)
+        delta = state.cost() - current
+        if delta > 0:
+            uphill.append(delta)
+        undo(state, changes)
+    t_start = (sum(uphill) / len(uphill)) / math.log(1.0/p0) if uphill else 1e-6
+    t_end = t_start * 1e-3
+
+    best = current
+    best_genome = list(state.genome)
+    started = time.time()
+    accepted = 0
+    it = 0
+    while iterations is None or it < iterations:
+        progress = 0.0 if iterations is None else it / float(iterations)
+        it += 1
+        if time_limit is not None:
+            progress = max(progress, (time.time() - started) / time_limit)
+            if progress >= 1.0:
+                break
+        temperature = t_start * (t_end / t_start) ** progress
+
+        changes = random_move(state, rng, slots=slots, movable=movable)
+        cost = state.cost()
+        delta = cost - current
+        if delta <= 0 or rng.random() < math.exp(-delta / temperature):
+            current = cost
+            accepted += 1
+            if current < best - 1e-12:
+                best = current
+                best_genome = list(state.genome)
+        else:
+            undo(state, changes)
+
+    log.info('Refinement: %d moves accepted, cost %.4f -> %.4f', accepted,
+             initial, best)
+    return best_genome, State(geometry, best_genome, weights).measures()
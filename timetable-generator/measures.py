@@ -15,7 +15,52 @@ def count_slots_of_tutor(timetable, tutor):
     return len(slots)
 
 ##
-# Returns the sum of difference between the number of slots of all tutors.
+# Returns the start times of the slots a tutor is available for.
+##
+def get_available_starts_of_tutor(timetable, tutor):
+    slots = timetable.get_slots()
+    if timetable.constraints != None:
+        slots = filter(lambda s: timetable.constraints.is_available(tutor, s.start, timetable.slotlen),
+                       slots)
+    return set(map(lambda s: s.start, slots))
+
+##
+# Returns the balance offsets of the number of slots of each tutor and
+# whether the test length of each tutor is balanced (in the order of
+# timetable.tutors).
+#
+# A tutor can supervise one slot per start time without overlaps, and at most
+# the time between the first and the last slot available. The share is the
+# smallest number of slots such that the tutors, each supervising at most this
+# share (and the slots available), cover all slots. A tutor available for
+# less slots than the share is balanced against the other tutors as if he/she
+# had the share (offset: share - available slots), otherwise the slot
+# difference would prefer overlaps of this tutor to a lower share. A tutor
+# whose availability is shorter than the share cannot have the test length
+# of the others and is left out of the test length difference. Without
+# constraints (or wide availability windows) all offsets are 0 and all test
+# lengths balanced.
+##
+def get_balance(timetable):
+    capacity = []
+    max_testlen = []
+    for tutor in timetable.tutors:
+        starts = sorted(get_available_starts_of_tutor(timetable, tutor))
+        capacity.append(len(starts))
+        max_testlen.append(minutes_between(starts[0], starts[-1]) / timetable.slotlen + 1 if starts else 0)
+    num_slots = len(timetable.get_slots())
+    if sum(capacity) < num_slots:
+        # overlaps unavoidable
+        share = max(capacity)
+    else:
+        share = num_slots / len(timetable.tutors)
+        while sum(min(c, share) for c in capacity) < num_slots:
+            share += 1
+    return [max(0, share - c) for c in capacity], [l >= share for l in max_testlen]
+
+##
+# Returns the sum of difference between the number of slots of all tutors
+# (plus their balance offsets, see get_balance).
 #
 # Worst case: When 1 tutor has all slots (the others have none), the difference
 # is (number of tutors - 1) * (number of slots). Best case: All tutors have the
@@ -24,9 +69,10 @@ def count_slots_of_tutor(timetable, tutor):
 def sum_up_slot_differences(timetable):
     sumslots = 0
     tutor_slot_cnt = []
+    offsets = get_balance(timetable)[0]
     # count slots of each tutor
-    for tutor in timetable.tutors:
-        c = count_slots_of_tutor(timetable, tutor)
+    for tutor, offset in zip(timetable.tutors, offsets):
+        c = count_slots_of_tutor(timetable, tutor) + offset
         tutor_slot_cnt.append(c)
     # compare number of slots and sum up
     for i in range(0, len(tutor_slot_cnt)):
@@ -93,24 +139,33 @@ def get_test_length(timetable):
         testlen = max(testlen, len(timetable._slot_matrix[r]))
     return testlen
 
+##
+# Returns the minutes from start time a to start time b (tests may run past
+# midnight).
+##
+def minutes_between(a, b):
+    delta = b - a
+    return delta.days*24*60 + delta.seconds/60
+
 ##
 # Returns the difference between last and first slot of a tutor (in number
 # of slots), i.e., overall time in slots the tutor supervises the test.
 ##
 def get_test_length_for_tutor(timetable, tutor):
     slots = filter(lambda s: s.tutor == tutor, timetable._slots)
-    slots = sorted(slots, key=lambda s: s.start.hour*60+s.start.minute)
+    slots = sorted(slots, key=lambda s: s.start)
     # tutors has slots?
     if len(slots) == 0:
         return 0
     # get min/max start time
     min_slot = slots[0]
     max_slot = slots[len(slots)-1]
-    return (max_slot.start - min_slot.start).seconds/60 / timetable.slotlen + 1
+    return minutes_between(min_slot.start, max_slot.start) / timetable.slotlen + 1
 
 ##
 # Returns the sum of difference between the test length (i.e., duration from
-# first slot to last slot) of all tutors.
+# first slot to last slot) of all tutors (whose test length is balanced, see
+# get_balance).
 #
 # Worst case: When 1 tutor has all slots (the others have none), the difference
 # is (number of tutors - 1) * (number of slots). Best case: All tutors have the
@@ -119,10 +174,12 @@ def get_test_length_for_tutor(timetable, tutor):
 def sum_up_testlength_differences(timetable):
     sumtestlen = 0
     tutor_testlen = []
+    balanced = get_balance(timetable)[1]
     # test length of each tutor
-    for tutor in timetable.tutors:
-        c = get_test_length_for_tutor(timetable, tutor)
-        tutor_testlen.append(c)
+    for tutor, b in zip(timetable.tutors, balanced):
+        if b:
+            c = get_test_length_for_tutor(timetable, tutor)
+            tutor_testlen.append(c)
     # compare test length and sum up
     for i in range(0, len(tutor_testlen)):
         for j in range(i, len(tutor_testlen)):
@@ -151,15 +208,40 @@ def count_tutor_holes(timetable):
     holes = 0
     for t in timetable.tutors:
         slots = filter(lambda s: s.tutor == t, timetable._slots)
-        slots = sorted(slots, key=lambda s: s.start.hour*60+s.start.minute)
+        slots = sorted(slots, key=lambda s: s.start)
         for i in range(len(slots)-1):
             # ignore overlapping slots
             if slots[i].start == slots[i+1].start:
                 continue
             # count holes (calculate from time difference)
-            holes += (slots[i+1].start - slots[i].start).seconds/60/timetable.slotlen - 1
+            holes += minutes_between(slots[i].start, slots[i+1].start)/timetable.slotlen - 1
     return holes
                 
+##
+# Count slots supervised by a tutor in a room he/she does not prefer.
+##
+def count_room_preference_violations(timetable):
+    if timetable.constraints == None:
+        return 0
+    violations = 0
+    for r in range(len(timetable._slot_matrix)):
+        for s in timetable._slot_matrix[r]:
+            if s == None:
+                continue
+            if not timetable.constraints.prefers(s.tutor, timetable.rooms[r]):
+                violations += 1
+    return violations
+
+##
+# Count slots supervised by a tutor who is not available at that time.
+##
+def count_unavailable_slots(timetable):
+    if timetable.constraints == None:
+        return 0
+    slots = filter(lambda s: not timetable.constraints.is_available(s.tutor, s.start, timetable.slotlen),
+                   timetable._slots)
+    return len(slots)
+
 ##
 # Returns pause offset to center of overall test time of a tutor.
 ##
@@ -202,5 +284,10 @@ def print_measures(timetable):
                                                   (len(timetable.tutors)-1)*len(timetable.get_slots()))
     ret += 'number of room changes: %d / %d\n' % (count_room_changes(timetable),
                                                   len(timetable.get_slots())-len(timetable.rooms))
+    if timetable.constraints != None:
+        ret += 'room preference violations: %d / %d\n' % (count_room_preference_violations(timetable),
+                                                          len(timetable.get_slots()))
+        ret += 'slots of unavailable tutors: %d / %d\n' % (count_unavailable_slots(timetable),
+                                                          len(timetable.get_slots()))
 
     return ret
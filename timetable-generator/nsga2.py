@@ -0,0 +1,178 @@
+#!/usr/bin/python
+##
+# @file nsga2.py
+# @date 18.10.2026
+#
+# @brief Multi-objective optimization of a timetable (NSGA-II).
+#
+# Instead of weighting the measures of a timetable into a single score (see
+# evaluation.py), the measures vector (fastmeasures.measures_matrix) is
+# minimized directly. The result is the set of non-dominated genomes (the
+# Pareto front), i.e., schedules where no measure can be improved without
+# worsening another one.
+#
+# The population and its offspring are stored in one fixed buffer of compact
+# genomes and their measures (population.Population, 2 x population size
+# rows), the measures of the offspring are computed in worker processes
+# sharing the buffer.
+#
+# K. Deb et al., A fast and elitist multiobjective genetic algorithm: NSGA-II,
+# IEEE Transactions on Evolutionary Computation, 2002.
+#
+
+import logging
+import numpy as np
+
+import fastmeasures
+import population
+
+# default parameters of the evolution
+POPULATION_SIZE = 80
+CROSSOVER_RATE = 0.9
+MUTATION_RATE = 0.02 # per slot
+
+##
+# Returns the domination matrix of the objectives (N x M, minimized).
+#
+# Element [i,j] is true if solution i dominates solution j, i.e., i is not
+# worse in any objective and better in at least one.
+##
+def dominates(objectives):
+    a = objectives[:, np.newaxis, :]
+    b = objectives[np.newaxis, :, :]
+    return (a <= b).all(axis=2) & (a < b).any(axis=2)
+
+##
+# Fast non-dominated sorting.
+#
+# Returns the rank (index of the front, 0 = non-dominated) of each solution.
+##
+def non_dominated_sort(objectives):
+    dom = dominates(objectives)
+    # number of solutions dominating each solution
+    dominated_by = dom.sum(axis=0)
+    ranks = np.full(len(objectives), -1, dtype=np.intp)
+    front = np.flatnonzero(dominated_by == 0)
+    rank = 0
+    while len(front) > 0:
+        ranks[front] = rank
+        # remove the front, solutions dominated only by the front become the
+        # next front
+        dominated_by = dominated_by - dom[front].sum(axis=0)
+        dominated_by[ranks >= 0] = -1
+        front = np.flatnonzero(dominated_by == 0)
+        rank += 1
+    return ranks
+
+##
+# Returns the crowding distance of each solution within its front.
+#
+# Boundary solutions of a front (in any objective) get an infinite distance.
+##
+def crowding_distance(objectives, ranks):
+    objectives = np.asarray(objectives, dtype=np.float64)
+    distance = np.zeros(len(objectives))
+    for rank in np.unique(ranks):
+        members = np.flatnonzero(ranks == rank)
+        front = objectives[members]
+        order = front.argsort(axis=0, kind='mergesort')
+        sorted_front = np.take_along_axis(front, order, axis=0)
+        span = sorted_front[-1] - sorted_front[0]
+        span[span == 0] = 1.0
+        # distance between neighbors (normalized), boundaries are infinite
+        gaps = np.full(front.shape, np.inf)
+        gaps[1:-1] = (sorted_front[2:] - sorted_front[:-2]) / span
+        d = np.zeros(front.shape)
+        np.put_along_axis(d, order, gaps, axis=0)
+        distance[members] = d.sum(axis=1)
+    return distance
+
+##
+# Binary tournament selection by rank and crowding distance.
+#
+# Returns indices of n selected solutions.
+##
+def tournament(ranks, distance, n, rng):
+    a = rng.randint(0, len(ranks), n)
+    b = rng.randint(0, len(ranks), n)
+    a_wins = (ranks[a] < ranks[b]) | ((ranks[a] == ranks[b]) & (distance[a] >= distance[b]))
+    return np.where(a_wins, a, b)
+
+##
+# Creates offspring by uniform crossover and point mutation.
+#
+# Both operators keep tutors available for their slots (crossover does not
+# move genes between slots, mutation samples available tutors).
+##
+def variation(parents, geometry, crossover_rate, mutation_rate, rng):
+    length = parents.shape[1]
+    moms = parents[0::2]
+    dads = parents[1::2]
+    pairs = min(len(moms), len(dads))
+    moms = moms[:pairs]
+    dads = dads[:pairs]
+    # uniform crossover of pairs (with probability crossover_rate)
+    cross = rng.random_sample(pairs) < crossover_rate
+    mask = (rng.random_sample((pairs, length)) < 0.5) & cross[:, np.newaxis]
+    sisters = np.where(mask, dads, moms)
+    brothers = np.where(mask, moms, dads)
+    offspring = np.concatenate((sisters, brothers, parents[2*pairs:]))
+    # point mutation: assign a random available tutor
+    mutate = rng.random_sample(offspring.shape) < mutation_rate
+    return np.where(mutate, fastmeasures.random_genomes(geometry, len(offspring), rng), offspring)
+
+##
+# Evolves a population minimizing the measures of the genomes.
+#
+# The initial population is random, except for the genomes given in 'seeds'.
+# The measures are computed by 'processes' worker processes, the buffer is
+# kept in memory-mapped files if filename is given (see population.py).
+# Returns the genomes of the Pareto front (without duplicates) and their
+# measures.
+##
+def evolve(geometry, generations, population_size=POPULATION_SIZE,
+           crossover_rate=CROSSOVER_RATE, mutation_rate=MUTATION_RATE,
+           seed=None, freq_stats=0, seeds=None, processes=1, filename=None):
+    log = logging.getLogger("nsga2")
+    rng = np.random.RandomState(seed)
+
+    # rows [0, n) hold the population, rows [n, 2n) the offspring
+    n = population_size
+    pop = population.Population(2*n, geometry.num_slots, geometry.dtype,
+                                fastmeasures.NUM_MEASURES, np.int64, filename)
+    evaluator = population.Evaluator(pop, lambda genomes: fastmeasures.measures_matrix(geometry, genomes),
+                                     processes)
+    log.debug('Population buffer: %d bytes', pop.nbytes())
+
+    try:
+        pop.genomes[:n] = fastmeasures.random_genomes(geometry, n, rng)
+        if seeds is not None and len(seeds) > 0:
+            seeds = np.asarray(seeds)[:n]
+            pop.genomes[:len(seeds)] = seeds
+        objectives = evaluator.evaluate(0, n)
+        ranks = non_dominated_sort(objectives)
+        distance = crowding_distance(objectives, ranks)
+
+        for generation in range(generations):
+            parents = pop.genomes[tournament(ranks, distance, n, rng)]
+            pop.genomes[n:] = variation(parents, geometry, crossover_rate, mutation_rate, rng)
+            evaluator.evaluate(n, 2*n)
+            # environmental selection on parents + offspring
+            union_ranks = non_dominated_sort(pop.scores)
+            union_distance = crowding_distance(pop.scores, union_ranks)
+            survivors = np.lexsort((-union_distance, union_ranks))[:n]
+            pop.genomes[:n] = pop.genomes[survivors]
+            pop.scores[:n] = pop.scores[survivors]
+            objectives = pop.scores[:n]
+            ranks = union_ranks[survivors]
+            distance = union_distance[survivors]
+
+            if freq_stats > 0 and generation % freq_stats == 0:
+                log.info('Gen. %d: %d non-dominated, best measures %s', generation,
+                         (ranks == 0).sum(), objectives.min(axis=0).tolist())
+    finally:
+        evaluator.close()
+
+    front = np.flatnonzero(ranks == 0)
+    genomes, unique = np.unique(pop.genomes[front], axis=0, return_index=True)
+    return genomes.astype(np.intp), objectives[front][unique]
@@ -0,0 +1,291 @@
+#!/usr/bin/python
+##
+# @file operators.py
+# @date 18.10.2026
+#
+# @brief Genetic operators for G1DList genomes of pyevolve.
+#
+# The default mutator of G1DList (swap of genes) moves tutors between slots
+# and the integer range mutator assigns any tutor, i.e., both may assign a
+# tutor who is not available for a slot. The operators here sample available
+# tutors only (see fastmeasures.Geometry), so every genome of the population
+# is feasible and no evaluation is wasted on rejected genomes. The crossover
+# operators of G1DList do not move genes between slots and keep feasibility.
+#
+# AdaptiveOperators controls the operators during a run: the probabilities of
+# the mutation operators (point, swap, block, column swap) and crossover operators
+# (single point, two point, uniform) follow their recent success (offspring
+# better than the best parent), the mutation rate follows the diversity of
+# the population.
+#
+# D. Thierens, An adaptive pursuit strategy for allocating operator
+# probabilities, GECCO 2005 (probability matching variant).
+#
+
+import logging
+import random
+import numpy as np
+
+from pyevolve import Crossovers
+
+# maximum number of slots reassigned by a block mutation
+MAX_BLOCK = 8
+
+# minimum probability of an operator, decay of the improvement and application
+# sums per generation, number of applications of the prior (the quality of an
+# operator is its improvement per application over the last generations
+# shrunk to the one of all operators of its kind)
+P_MIN = 0.05
+DECAY = 0.8
+PRIOR = 20.0
+
+# mutation rate (per gene) is adapted within these bounds by this factor per
+# generation to keep the Hamming diversity of the population close to a
+# target decreasing linearly over the run
+MUTATION_RATE_MIN = 0.01
+MUTATION_RATE_MAX = 0.2
+MUTATION_RATE_FACTOR = 1.2
+DIVERSITY_START = 0.3
+DIVERSITY_END = 0.02
+
+##
+# Returns a pyevolve mutator assigning random available tutors.
+#
+# Like G1DListMutatorIntegerRange, each gene is mutated with probability
+# pmut (expected pmut * genome length mutations).
+##
+def mutator(geometry, rng=random):
+    options = available_tutors(geometry)
+    def mutate(genome, **args):
+        if args["pmut"] <= 0.0:
+            return 0
+        size = len(genome)
+        mutations = args["pmut"] * size
+        if mutations < 1.0:
+            mutations = 0
+            for i in range(size):
+                if rng.random() < args["pmut"]:
+                    genome[i] = rng.choice(options[i])
+                    mutations += 1
+        else:
+            for x in range(int(round(mutations))):
+                i = rng.randrange(size)
+                genome[i] = rng.choice(options[i])
+        return int(mutations)
+    return mutate
+
+##
+# Returns the available tutors of each slot (list of lists).
+##
+def available_tutors(geometry):
+    return [o[:n] for o, n in zip(geometry.options.tolist(), geometry.num_options.tolist())]
+
+##
+# Returns the mean Hamming distance of all pairs of genomes (N x number of
+# slots matrix) relative to the number of slots.
+##
+def hamming_diversity(genomes, num_tutors):
+    genomes = np.asarray(genomes, dtype=np.intp)
+    n, length = genomes.shape
+    if n < 2:
+        return 0.0
+    idx = genomes + num_tutors * np.arange(length)[np.newaxis, :]
+    counts = np.bincount(idx.ravel(), minlength=length*num_tutors).reshape(length, num_tutors)
+    # pairs of genomes with equal gene per slot
+    equal = (counts * (counts - 1)).sum(axis=1) / float(n * (n - 1))
+    return float((1.0 - equal).mean())
+
+##
+# Mutation and crossover operators with adaptive probabilities.
+#
+# Use mutator, crossover and step as mutator, crossover and step callback of
+# pyevolve. Offspring are tagged with the operators creating them and the
+# score of the better parent. After evaluation (step callback), each
+# operator is credited with the improvements of its offspring on the parent
+# (per application), the tags are removed.
+##
+class AdaptiveOperators:
+    MUTATIONS = ['point', 'swap', 'block', 'column swap']
+    CROSSOVERS = ['single point', 'two point', 'uniform']
+
+    ##
+    # Constructor
+    ##
+    def __init__(self, geometry, rng=random):
+        self._log = logging.getLogger("operators")
+        self.geometry = geometry
+        self.rng = rng
+        self.options = available_tutors(geometry)
+        self.prev = [-1] * geometry.num_slots
+        self.next = [-1] * geometry.num_slots
+        for l, r in zip(geometry.left.tolist(), geometry.right.tolist()):
+            self.next[l] = r
+            self.prev[r] = l
+        # slots of each column with at least 2 slots
+        columns = [[] for c in range(geometry.num_cols)]
+        for i, c in enumerate(geometry.cols.tolist()):
+            columns[c].append(i)
+        self.columns = [column for column in columns if len(column) > 1]
+
+        self._crossover_funcs = {
+            'single point': Crossovers.G1DListCrossoverSinglePoint,
+            'two point': Crossovers.G1DListCrossoverTwoPoint,
+            'uniform': Crossovers.G1DListCrossoverUniform,
+        }
+        self._mutation_funcs = {
+            'point': self._point,
+            'swap': self._swap,
+            'block': self._block,
+            'column swap': self._column_swap,
+        }
+        self.probabilities = {}
+        self.quality = {}
+        self.applied = {}
+        self.improved = {}
+        self._applied = {}
+        self._improved = {}
+        for name in self.MUTATIONS + self.CROSSOVERS:
+            self.applied[name] = 0
+            self.improved[name] = 0
+            self._applied[name] = 0.0
+            self._improved[name] = 0.0
+        self._update_probabilities()
+        self.diversity = None
+
+    def _choose(self, names):
+        x = self.rng.random()
+        for name in names:
+            x -= self.probabilities[name]
+            if x < 0:
+                return name
+        return names[-1]
+
+    def _update_probabilities(self):
+        for names in (self.MUTATIONS, self.CROSSOVERS):
+            applied = sum(self._applied[name] for name in names)
+            improved = sum(self._improved[name] for name in names)
+            rate = improved / applied if applied > 0 else 0.0
+            for name in names:
+                self.quality[name] = (self._improved[name] + PRIOR * rate) / \
+                                     (self._applied[name] + PRIOR)
+            total = sum(self.quality[name] for name in names)
+            for name in names:
+                q = self.quality[name] / total if total > 0 else 1.0 / len(names)
+                self.probabilities[name] = P_MIN + (1 - len(names) * P_MIN) * q
+
+    def _point(self, genome):
+        i = self.rng.randrange(len(genome))
+        genome[i] = self.rng.choice(self.options[i])
+
+    def _swap(self, genome):
+        i, j = self.rng.sample(xrange(len(genome)), 2)
+        if self.geometry.is_feasible(i, genome[j]) and self.geometry.is_feasible(j, genome[i]):
+            genome[i], genome[j] = genome[j], genome[i]
+
+    def _block(self, genome):
+        i = self.rng.randrange(len(genome))
+        # continue the run of the previous slot in the room or take a random
+        # tutor
+        if self.prev[i] >= 0 and self.rng.random() < 0.5 \
+           and self.geometry.is_feasible(i, genome[self.prev[i]]):
+            t = genome[self.prev[i]]
+        else:
+            t = self.rng.choice(self.options[i])
+        for x in range(self.rng.randint(1, MAX_BLOCK)):
+            genome[i] = t
+            i = self.next[i]
+            if i < 0 or not self.geometry.is_feasible(i, t):
+                break
+
+    def _column_swap(self, genome):
+        if not self.columns:
+            return self._point(genome)
+        i, j = self.rng.sample(self.rng.choice(self.columns), 2)
+        if self.geometry.is_feasible(i, genome[j]) and self.geometry.is_feasible(j, genome[i]):
+            genome[i], genome[j] = genome[j], genome[i]
+
+    ##
+    # Mutator of pyevolve.
+    #
+    # Applies a mutation operator per gene with probability pmut (each
+    # operator chosen by its probability).
+    ##
+    def mutator(self, genome, **args):
+        if args["pmut"] <= 0.0:
+            return 0
+        mutations = 0
+        if not hasattr(genome, 'parent_score'):
+            # clone of a parent (no crossover)
+            genome.parent_score = genome.score
+            genome.operators = []
+        for x in range(len(genome)):
+            if self.rng.random() < args["pmut"]:
+                name = self._choose(self.MUTATIONS)
+                self._mutation_funcs[name](genome)
+                genome.operators.append(name)
+                mutations += 1
+        return mutations
+
+    ##
+    # Crossover of pyevolve (chooses a crossover operator by its
+    # probability).
+    ##
+    def crossover(self, genome, **args):
+        name = self._choose(self.CROSSOVERS)
+        sister, brother = self._crossover_funcs[name](genome, **args)
+        parent_score = max(args["mom"].score, args["dad"].score)
+        for child in (sister, brother):
+            if child is not None:
+                child.parent_score = parent_score
+                child.operators = [name]
+        return (sister, brother)
+
+    ##
+    # Step callback of pyevolve, adapts the operators to the evaluated
+    # population.
+    ##
+    def step(self, ga):
+        applied = dict((name, 0) for name in self.applied)
+        improved = dict((name, 0) for name in self.applied)
+        population = ga.getPopulation()
+        for ind in population:
+            if not hasattr(ind, 'parent_score'):
+                continue
+            for name in set(ind.operators):
+                applied[name] += 1
+                if ind.score > ind.parent_score:
+                    improved[name] += ind.score - ind.parent_score
+            del ind.parent_score
+            del ind.operators
+
+        # operator qualities: improvement per application of the decayed sums
+        for name in applied:
+            self._applied[name] = DECAY * self._applied[name] + applied[name]
+            self._improved[name] = DECAY * self._improved[name] + improved[name]
+            self.applied[name] += applied[name]
+            self.improved[name] += improved[name]
+        self._update_probabilities()
+
+        # mutation rate: keep the diversity close to the target
+        progress = ga.getCurrentGeneration() / float(max(1, ga.nGenerations))
+        target = DIVERSITY_START + (DIVERSITY_END - DIVERSITY_START) * progress
+        self.diversity = hamming_diversity([ind.genomeList for ind in population],
+                                           self.geometry.num_tutors)
+        rate = ga.pMutation
+        if self.diversity < target:
+            rate *= MUTATION_RATE_FACTOR
+        else:
+            rate /= MUTATION_RATE_FACTOR
+        ga.setMutationRate(min(MUTATION_RATE_MAX, max(MUTATION_RATE_MIN, rate)))
+
+        self._log.debug('Gen. %d: diversity %.3f (target %.3f), mutation rate %.4f, %s',
+                        ga.getCurrentGeneration(), self.diversity, target, ga.pMutation,
+                        self.summary())
+        return False
+
+    ##
+    # Returns the operator probabilities as string.
+    ##
+    def summary(self):
+        return ', '.join('%s %.2f' % (name, self.probabilities[name])
+                         for name in self.MUTATIONS + self.CROSSOVERS)
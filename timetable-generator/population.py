@@ -0,0 +1,153 @@
+#!/usr/bin/python
+##
+# @file population.py
+# @date 18.10.2026
+#
+# @brief Compact population storage shared with worker processes.
+#
+# A population of pyevolve is a list of G1DList objects holding Python lists
+# of Python ints (dozens of bytes per gene), and a process pool pickles each
+# genome it evaluates. Here a population is a single contiguous matrix
+# (N x number of slots) of small unsigned ints (fastmeasures.genome_dtype, 1
+# byte per gene for up to 256 tutors) and a matrix of scores (N x number of
+# scores), allocated once:
+#
+# - in shared memory (multiprocessing.RawArray), or
+# - in memory-mapped files (shared mappings, a population larger than the
+#   main memory is paged by the operating system).
+#
+# Both are inherited by the worker processes of a pool forked after the
+# allocation. The workers of an Evaluator score ranges of rows and write the
+# scores into the shared matrix. Per task only the range (two integers) is
+# sent and the number of scored genomes is returned, no genome or score is
+# pickled.
+#
+
+import ctypes
+import multiprocessing
+import numpy as np
+
+# number of genomes scored per task of a worker
+CHUNK = 64
+
+##
+# Returns a numpy array of the shape and type in shared memory or in a
+# memory-mapped file (if filename is given).
+##
+def allocate(shape, dtype, filename=None):
+    dtype = np.dtype(dtype)
+    if filename != None:
+        return np.memmap(filename, dtype=dtype, mode='w+', shape=shape)
+    size = int(np.prod(shape)) * dtype.itemsize
+    buf = multiprocessing.RawArray(ctypes.c_byte, max(1, size))
+    return np.frombuffer(buf, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+
+##
+# Population of genomes and their scores in shared buffers.
+##
+class Population:
+    ##
+    # Constructor
+    #
+    # Allocates buffers for size genomes of num_slots genes (type dtype) and
+    # num_scores scores per genome (type score_dtype). With filename, the
+    # buffers are the memory-mapped files filename (genomes) and
+    # filename.scores.
+    ##
+    def __init__(self, size, num_slots, dtype=np.uint8, num_scores=1,
+                 score_dtype=np.float64, filename=None):
+        self.size = size
+        self.num_slots = num_slots
+        self.dtype = np.dtype(dtype)
+        self.num_scores = num_scores
+        self.score_dtype = np.dtype(score_dtype)
+        self.filename = filename
+        scores_filename = None
+        if filename != None:
+            scores_filename = filename + '.scores'
+        self.genomes = allocate((size, num_slots), dtype, filename)
+        self.scores = allocate((size, num_scores), score_dtype, scores_filename)
+
+    def __len__(self):
+        return self.size
+
+    ##
+    # Returns the size of the buffers in bytes.
+    ##
+    def nbytes(self):
+        return self.genomes.nbytes + self.scores.nbytes
+
+    ##
+    # Writes the memory-mapped buffers to their files.
+    ##
+    def flush(self):
+        if self.filename != None:
+            self.genomes.flush()
+            self.scores.flush()
+
+##
+# Scores the genomes start, ..., stop-1 of a population.
+##
+def score_rows(population, score_func, start, stop):
+    scores = score_func(population.genomes[start:stop])
+    population.scores[start:stop] = np.reshape(scores, (stop - start, population.num_scores))
+    return stop - start
+
+# population and scoring function of a worker process
+_worker = {}
+
+def _init_worker(population, score_func):
+    _worker['population'] = population
+    _worker['score_func'] = score_func
+
+def _score_rows(rows):
+    return score_rows(_worker['population'], _worker['score_func'], rows[0], rows[1])
+
+##
+# Scores genomes of a population in worker processes.
+#
+# score_func maps a matrix of genomes (n x number of slots) to their scores
+# (n x number of scores, or a vector of n scores). The pool is started by the
+# constructor, so it inherits the shared memory and score_func (no pickling,
+# score_func may be a closure).
+##
+class Evaluator:
+    ##
+    # Constructor
+    ##
+    def __init__(self, population, score_func, processes=1, chunk=CHUNK):
+        self.population = population
+        self.score_func = score_func
+        self.processes = processes
+        self.chunk = chunk
+        # number of genomes scored
+        self.evaluations = 0
+        self.pool = None
+        if processes > 1:
+            self.pool = multiprocessing.Pool(processes, _init_worker, (population, score_func))
+
+    ##
+    # Scores the genomes start, ..., stop-1 (default all), the scores are
+    # written to population.scores.
+    ##
+    def evaluate(self, start=0, stop=None):
+        if stop == None:
+            stop = len(self.population)
+        if self.pool == None or stop - start <= self.chunk:
+            score_rows(self.population, self.score_func, start, stop)
+        else:
+            # chunks of similar size, at least one per worker
+            num_chunks = max(self.processes, (stop - start) // self.chunk)
+            bounds = np.linspace(start, stop, num_chunks + 1).astype(int).tolist()
+            self.pool.map(_score_rows, zip(bounds[:-1], bounds[1:]))
+        self.evaluations += stop - start
+        return self.population.scores[start:stop]
+
+    ##
+    # Stops the worker processes.
+    ##
+    def close(self):
+        if self.pool != None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
@@ -0,0 +1,144 @@
+#!/usr/bin/python
+##
+# @file seeding.py
+# @date 18.10.2026
+#
+# @brief Constructive heuristics for the initial population.
+#
+# Random genomes are dominated by overlaps and uneven loads. The heuristics
+# here build balanced starting schedules:
+#
+# - round robin: the slots of all rooms (room by room, in time order) are cut
+#   into contiguous blocks of equal length, which are assigned to the tutors
+#   in turn.
+# - greedy: columns (start times) are filled in time order, each slot gets
+#   the tutor of the previous slot in the room if possible, otherwise the
+#   least loaded tutor not yet busy at that time (no overlaps as long as there
+#   are at least as many tutors as rooms).
+#
+# Rotations of the tutor list give further, equally good seeds.
+#
+# Seeds assign available tutors only (see fastmeasures.Geometry): a tutor
+# not available for a slot is replaced by the next available one (round
+# robin, rotations) or not considered at all (greedy).
+#
+
+import itertools
+import random
+import numpy as np
+
+# default fraction of seeded individuals in the initial population
+SEED_RATIO = 0.5
+
+##
+# Returns the slots of each room in time order (list of lists of slot
+# indices).
+##
+def room_sequences(geometry):
+    order = np.lexsort((geometry.cols, geometry.rows))
+    rows = geometry.rows[order]
+    return [order[rows == r].tolist() for r in range(geometry.num_rooms)]
+
+##
+# Returns tutor t if available for slot i, otherwise the next available tutor
+# (cyclic order).
+##
+def available(geometry, i, t):
+    num_tutors = geometry.num_tutors
+    for k in range(num_tutors):
+        if geometry.is_feasible(i, (t + k) % num_tutors):
+            return (t + k) % num_tutors
+    raise RuntimeError('No tutor available for slot %d.' % (i))
+
+##
+# Returns the genome with tutor indices rotated by k.
+##
+def rotate(geometry, genome, k):
+    return [available(geometry, i, (t + k) % geometry.num_tutors) for i, t in enumerate(genome)]
+
+##
+# Returns a random genome assigning an available tutor to each slot.
+##
+def random_genome(geometry, rng=random):
+    options = geometry.options.tolist()
+    return [options[i][rng.randrange(n)] for i, n in enumerate(geometry.num_options.tolist())]
+
+##
+# Round robin assignment of contiguous blocks.
+#
+# Each tutor gets 'blocks' blocks of (about) equal length, the first block
+# goes to tutor 'rotation'.
+##
+def round_robin(geometry, rotation=0, blocks=1):
+    genome = [0] * geometry.num_slots
+    slots = [i for seq in room_sequences(geometry) for i in seq]
+    num_blocks = geometry.num_tutors * blocks
+    for j, i in enumerate(slots):
+        block = j * num_blocks // len(slots)
+        genome[i] = available(geometry, i, (block + rotation) % geometry.num_tutors)
+    return genome
+
+##
+# Greedy column-wise assignment avoiding overlaps and balancing loads.
+##
+def greedy(geometry, rng=random):
+    num_tutors = geometry.num_tutors
+    target = geometry.num_slots / float(num_tutors)
+    genome = [0] * geometry.num_slots
+    load = [0] * num_tutors
+    prev = dict(zip(geometry.right.tolist(), geometry.left.tolist()))
+    columns = [[] for c in range(geometry.num_cols)]
+    for i, c in enumerate(geometry.cols.tolist()):
+        columns[c].append(i)
+    options = [o[:n] for o, n in zip(geometry.options.tolist(), geometry.num_options.tolist())]
+    for column in columns:
+        rng.shuffle(column)
+        busy = set()
+        for i in column:
+            t = genome[prev[i]] if i in prev else None
+            if t is None or t in busy or load[t] + 1 > target or not geometry.is_feasible(i, t):
+                # least loaded free (available) tutor, ties broken randomly
+                free = [x for x in options[i] if x not in busy] or options[i]
+                t = min(free, key=lambda x: (load[x], rng.random()))
+            genome[i] = t
+            busy.add(t)
+            load[t] += 1
+    return genome
+
+##
+# Returns n seed genomes built by the heuristics.
+##
+def seed_genomes(geometry, n, rng=random):
+    seeds = []
+    for k in range(n):
+        rotation = k // 3
+        if k % 3 == 0:
+            genome = round_robin(geometry, rotation, 1 + (k // 3) % 3)
+        elif k % 3 == 1:
+            genome = greedy(geometry, rng)
+        else:
+            genome = rotate(geometry, greedy(geometry, rng), rotation)
+        seeds.append(genome)
+    return seeds
+
+##
+# Returns a pyevolve initializator for G1DList genomes mixing seeds and
+# random genomes.
+#
+# The initial population is built from the seeds (fraction 'ratio' of the
+# population) followed by random genomes (available tutors only, see
+# random_genome). The sequence repeats, i.e., the population can be
+# initialized several times (GSimpleGA.evolve initializes the population
+# again).
+##
+def initializator(geometry, population_size, ratio=SEED_RATIO, rng=random):
+    num_seeds = int(round(population_size * ratio))
+    seeds = seed_genomes(geometry, num_seeds, rng)
+    sequence = itertools.cycle(seeds + [None] * (population_size - num_seeds))
+    def init(genome, **args):
+        seed = next(sequence)
+        if seed is None:
+            genome.genomeList = random_genome(geometry, rng)
+        else:
+            genome.genomeList = list(seed)
+    return init
@@ -0,0 +1,177 @@
+#!/usr/bin/python
+##
+# @file solver.py
+# @date 18.10.2026
+#
+# @brief Single objective genetic algorithm (pyevolve) on a timetable.
+#
+# Sets up the G1DList genome (seeded initialization, mutation of available
+# tutors) and the GA engine of pyevolve for a timetable given by its geometry
+# (see fastmeasures.Geometry), optionally with adaptive operators (see
+# operators.AdaptiveOperators). Used by generate.py and the parameter sweep
+# (sweep.py).
+#
+# pyevolve scores the individuals one by one. A BatchGA scores a whole
+# generation at once instead: the genomes are copied into a compact
+# population buffer (population.Population) and scored by a function of the
+# genome matrix (e.g., evaluation.fuzzy_population) in worker processes
+# sharing the buffer, optionally prescreened by their score bound (see
+# evaluation.Prescreen).
+#
+
+import random
+import numpy as np
+
+from pyevolve import G1DList, GPopulation, GSimpleGA, Selectors
+
+import operators
+import population
+import seeding
+
+# number of generations of evolutionary algorithm
+GENERATIONS = 100
+
+# number of individuals (default of pyevolve)
+POPULATION_SIZE = 80
+
+##
+# Population of a BatchGA, scored by the engine at once.
+##
+class BatchPopulation(GPopulation.GPopulation):
+    ##
+    # Constructor (copy of the population logic of 'pop').
+    ##
+    def __init__(self, pop, engine):
+        GPopulation.GPopulation.__init__(self, pop)
+        self.engine = engine
+
+    def evaluate(self, **args):
+        self.engine.score(self.internalPop)
+        self.clearFlags()
+
+##
+# GA engine scoring the individuals of a generation in one batch.
+#
+# score_func maps a genome matrix (n x number of slots) to the n scores. The
+# initial population is a BatchPopulation. The offspring population of
+# GSimpleGA.step is a plain GPopulation: the evaluator of the genomes only
+# queues the offspring (preliminary score 0), they are scored by clear(),
+# which the step calls after the evaluation and before the elitism. The
+# scores do not depend on the batch, so the evolution is the one of the
+# individual evaluation.
+##
+class BatchGA(GSimpleGA.GSimpleGA):
+    ##
+    # Constructor
+    #
+    # Genomes are scored by 'processes' worker processes (started by evolve),
+    # if prescreen is given only those whose bound reaches the threshold.
+    ##
+    def __init__(self, genome, geometry, score_func, seed=None, processes=1,
+                 prescreen=None):
+        genome.evaluator.set(self._queue)
+        GSimpleGA.GSimpleGA.__init__(self, genome, seed)
+        self.internalPop = BatchPopulation(self.internalPop, self)
+        self.geometry = geometry
+        self.score_func = score_func
+        self.processes = processes
+        self.prescreen = prescreen
+        self.queued = []
+        self.evaluator = None
+
+    def _queue(self, chromosome):
+        self.queued.append(chromosome)
+        return 0.0
+
+    ##
+    # Scores the individuals (sets their score).
+    ##
+    def score(self, individuals):
+        n = len(individuals)
+        buf = self.evaluator.population
+        genomes = np.array([ind.genomeList for ind in individuals], dtype=buf.dtype)
+        scores = np.empty(n)
+        full = np.ones(n, dtype=bool)
+        if self.prescreen is not None:
+            scores, full = self.prescreen.screen(genomes)
+        # genomes to score fully in the first rows of the buffer
+        k = int(full.sum())
+        if k > 0:
+            buf.genomes[:k] = genomes[full]
+            scores[full] = self.evaluator.evaluate(0, k)[:, 0]
+        for ind, s in zip(individuals, scores.tolist()):
+            ind.score = s
+
+    def clear(self):
+        self.score(self.queued)
+        del self.queued[:]
+
+    def evolve(self, freq_stats=0):
+        # a generation (initial population or offspring) has population
+        # size genomes
+        buf = population.Population(self.getPopulation().popSize, self.geometry.num_slots,
+                                    self.geometry.dtype)
+        self.evaluator = population.Evaluator(buf, self.score_func, self.processes)
+        try:
+            return GSimpleGA.GSimpleGA.evolve(self, freq_stats)
+        finally:
+            self.evaluator.close()
+
+##
+# Returns the GA engine optimizing the genomes of a timetable.
+#
+# eval_func maps a genome (list of tutor indices) to its score (maximized).
+# Mutation and crossover rates default to the ones of pyevolve, seed_ratio is
+# the fraction of the initial population built by constructive heuristics
+# (see seeding.initializator). The random seed makes runs reproducible.
+# With adaptive, the operator probabilities and the mutation rate are adapted
+# during the run, the controller is available as ga.adaptive.
+#
+# With score_func (genome matrix to scores, see BatchGA), generations are
+# scored at once by 'processes' processes instead of eval_func, prescreened
+# if prescreen is given (its step is added to the step callbacks, requires
+# score_func).
+##
+def ga_engine(geometry, eval_func, generations=GENERATIONS, population_size=POPULATION_SIZE,
+              mutation_rate=None, crossover_rate=None, seed_ratio=seeding.SEED_RATIO,
+              seed=None, adaptive=False, score_func=None, processes=1, prescreen=None):
+    rng = random.Random(seed)
+
+    # genome instance (first one)
+    genome = G1DList.G1DList(geometry.num_slots)
+    if score_func is None:
+        if prescreen is not None:
+            raise RuntimeError('Prescreening requires a population score function (score_func).')
+        genome.evaluator.set(eval_func)
+    genome.setParams(rangemin=0, rangemax=geometry.num_tutors-1)
+    genome.initializator.set(seeding.initializator(geometry, population_size, seed_ratio, rng))
+    if adaptive:
+        ctrl = operators.AdaptiveOperators(geometry, rng)
+        genome.mutator.set(ctrl.mutator)
+        genome.crossover.set(ctrl.crossover)
+    elif geometry.constrained:
+        # default mutator (swap) would move tutors to slots they are not
+        # available for
+        genome.mutator.set(operators.mutator(geometry, rng))
+
+    # create GA engine
+    if score_func is not None:
+        ga = BatchGA(genome, geometry, score_func, seed, processes, prescreen)
+    else:
+        ga = GSimpleGA.GSimpleGA(genome, seed)
+    # rank selection (best individuals only), evaluation.Prescreen relies on
+    # it
+    ga.selector.set(Selectors.GRankSelector)
+    ga.setPopulationSize(population_size)
+    ga.setGenerations(generations)
+    if mutation_rate is not None:
+        ga.setMutationRate(mutation_rate)
+    if crossover_rate is not None:
+        ga.setCrossoverRate(crossover_rate)
+    ga.adaptive = None
+    if adaptive:
+        ga.stepCallback.add(ctrl.step)
+        ga.adaptive = ctrl
+    if prescreen is not None:
+        ga.stepCallback.add(prescreen.step)
+    return ga
@@ -0,0 +1,364 @@
+#!/usr/bin/python
+##
+# @file sweep.py
+# @date 18.10.2026
+#
+# @brief Parameter sweep of the genetic algorithm and the evaluation functions.
+#
+# Runs the genetic algorithm (see solver.py) for each point of a parameter
+# grid or random search and several random seeds per point, distributed over
+# a pool of processes. The timetable and its geometry are built once and
+# handed to each worker process at startup.
+#
+# The parameter space is given in a JSON file, either as grid (all
+# combinations of the listed values) or as random search:
+#
+#   {"grid": {"mutation_rate": [0.01, 0.02], "population_size": [40, 80]},
+#    "fixed": {"generations": 50}}
+#
+#   {"random": {"samples": 20,
+#               "params": {"mutation_rate": {"min": 0.005, "max": 0.1, "log": true},
+#                          "weights.rchanges": {"min": 0.4, "max": 2.0},
+#                          "population_size": [40, 80, 160]}}}
+#
+# A random parameter is either a list of choices or a range (integer range if
+# min and max are integers, log-uniform if log is true).
+#
+# Parameters:
+#
+# - generations, population_size, mutation_rate, crossover_rate, seed_ratio,
+#   adaptive: settings of the genetic algorithm (adaptive is true or false,
+#   see operators.AdaptiveOperators).
+# - weights.<criterion>: weight of a criterion of the piecewise linear
+#   evaluation (see evaluation.PIECEWISE_WEIGHTS).
+# - breakpoints.<input>.<term>: relative breakpoints of a membership function
+#   of the fuzzy evaluation (see evaluation.FUZZY_BREAKPOINTS), a list of 3
+#   numbers.
+#
+# Genomes are scored by the vectorized evaluation functions
+# (evaluation.fuzzy_population, evaluation.piecewise_population) with the
+# weights and breakpoints of the point, a generation at once (see
+# solver.BatchGA). To compare the points, the best
+# genome of each generation is also scored by the evaluation function with
+# default parameters (reference score). The number of evaluations (and the
+# time) until the reference score reaches the target is recorded.
+#
+# Each run is a row of the results table (CSV). A summary per point, sorted by
+# the fraction of runs reaching the target and the mean time to reach it, is
+# printed at the end.
+#
+
+import argparse
+import csv
+import datetime
+import itertools
+import json
+import logging
+import math
+import multiprocessing
+import random
+import time
+import numpy as np
+
+from timetable import Timetable
+import constraints
+import evaluation
+import fastmeasures
+import solver
+
+# parameters of the genetic algorithm (and their types)
+GA_PARAMS = {
+    'generations': int,
+    'population_size': int,
+    'mutation_rate': float,
+    'crossover_rate': float,
+    'seed_ratio': float,
+    'adaptive': bool,
+}
+
+# default number of runs (seeds) per point
+SEEDS = 3
+
+# default tutors (see generate.py)
+tutors = ['Benedikt', 'Fabjan', 'Linus', 'Lukas', 'Mario', 'Neu']
+
+##
+# Returns the points (list of parameter dicts) of a sweep specification.
+##
+def points(spec, rng=random):
+    fixed = spec.get('fixed', {})
+    if 'grid' in spec:
+        names = sorted(spec['grid'].keys())
+        ps = [dict(zip(names, values))
+              for values in itertools.product(*[spec['grid'][n] for n in names])]
+    elif 'random' in spec:
+        params = spec['random']['params']
+        ps = [dict((n, sample(params[n], rng)) for n in sorted(params.keys()))
+              for x in range(spec['random']['samples'])]
+    else:
+        ps = [{}]
+    ps = [dict(fixed, **p) for p in ps]
+    for p in ps:
+        check(p)
+    return ps
+
+##
+# Returns a random value of a parameter of the random search.
+##
+def sample(param, rng=random):
+    if isinstance(param, list):
+        return rng.choice(param)
+    a = param['min']
+    b = param['max']
+    if param.get('log', False):
+        return math.exp(rng.uniform(math.log(a), math.log(b)))
+    if isinstance(a, int) and isinstance(b, int):
+        return rng.randint(a, b)
+    return rng.uniform(a, b)
+
+##
+# Raises an error if a point contains an unknown parameter.
+##
+def check(point):
+    for name, value in point.items():
+        parts = name.split('.')
+        if name in GA_PARAMS:
+            continue
+        if parts[0] == 'weights' and len(parts) == 2 and parts[1] in evaluation.PIECEWISE_WEIGHTS:
+            continue
+        if parts[0] == 'breakpoints' and len(parts) == 3 \
+           and parts[2] in evaluation.FUZZY_BREAKPOINTS.get(parts[1], {}):
+            if len(value) != 3:
+                raise RuntimeError('Breakpoints %s must be a list of 3 numbers.' % (name))
+            continue
+        raise RuntimeError('Unknown parameter %s.' % (name))
+
+##
+# Splits a point into settings of the GA, weights and breakpoints.
+##
+def split(point):
+    ga = {}
+    weights = {}
+    breakpoints = {}
+    for name, value in point.items():
+        parts = name.split('.')
+        if name in GA_PARAMS:
+            ga[name] = GA_PARAMS[name](value)
+        elif parts[0] == 'weights':
+            weights[parts[1]] = float(value)
+        else:
+            breakpoints.setdefault(parts[1], {})[parts[2]] = [float(x) for x in value]
+    return ga, weights, breakpoints
+
+
+#
+# Worker
+#
+
+# timetable, geometry and evaluation function of a worker process (set by
+# init_worker)
+_worker = {}
+
+##
+# Initializes a worker process with the timetable and its geometry.
+##
+def init_worker(timetable, geometry, eval_func_str):
+    _worker['timetable'] = timetable
+    _worker['geometry'] = geometry
+    _worker['eval_func_str'] = eval_func_str
+    _worker['score'] = scoring(timetable, geometry, eval_func_str, {}, {})
+
+##
+# Returns a function scoring genomes (see fastmeasures.as_population) with the
+# evaluation function given its weights (piecewise linear) or breakpoints
+# (fuzzy).
+#
+# Genomes activating no fuzzy rule (undefined score) get a score of 0.
+##
+def scoring(timetable, geometry, eval_func_str, weights, breakpoints):
+    if eval_func_str == 'fuzzy':
+        compiled = evaluation.fuzzy_system(timetable, breakpoints)[2]
+        def score(genomes):
+            return np.nan_to_num(evaluation.fuzzy_population(geometry, genomes, compiled))
+    else:
+        def score(genomes):
+            return evaluation.piecewise_population(geometry, genomes, weights)
+    return score
+
+##
+# Runs the genetic algorithm for a point (task = (point index, point, seed,
+# target)). Returns a row of the results table (dict).
+##
+def run(task):
+    index, point, seed, target = task
+    geometry = _worker['geometry']
+    reference = _worker['score']
+    ga_params, weights, breakpoints = split(point)
+    score = scoring(_worker['timetable'], geometry, _worker['eval_func_str'], weights, breakpoints)
+
+    evaluations = [0]
+    reached = {}
+    started = time.time()
+    def score_func(genomes):
+        evaluations[0] += len(genomes)
+        return score(genomes)
+    def step(ga):
+        if target is not None and 'evaluations' not in reached \
+           and reference(ga.bestIndividual().genomeList)[0] >= target:
+            reached['evaluations'] = evaluations[0]
+            reached['time'] = time.time() - started
+        return False
+
+    # generations scored at once (runs are distributed over the processes)
+    ga = solver.ga_engine(geometry, None, seed=seed, score_func=score_func, **ga_params)
+    ga.stepCallback.add(step)
+    ga.evolve()
+    best = ga.bestIndividual().genomeList
+    wall_time = time.time() - started
+
+    row = dict(point)
+    row['point'] = index
+    row['seed'] = seed
+    row['score'] = float(score(best)[0])
+    row['reference_score'] = float(reference(best)[0])
+    for name, m in zip(fastmeasures.MEASURE_NAMES, fastmeasures.measures_matrix(geometry, best)[0]):
+        row[name] = int(m)
+    row['evaluations'] = evaluations[0]
+    row['evaluations_to_target'] = reached.get('evaluations')
+    row['time_to_target'] = reached.get('time')
+    row['wall_time'] = wall_time
+    return row
+
+
+#
+# Main
+#
+
+##
+# Returns the timetable given by the command line arguments (lab rooms like
+# generate.py).
+##
+def build_timetable(args):
+    start = datetime.datetime.strptime(args.start, '%d.%m.%Y %H:%M')
+    if args.test == 1:
+        rooms = ['R1', 'R2', 'R3', 'R4']
+    else:
+        rooms = ['R4', 'R1', 'R2', 'R3']
+    if len(args.tutors) < len(rooms):
+        raise RuntimeError('Too few tutors specified. Number of tutors must be greater or equal number of rooms (4).')
+    tutor_constraints = None
+    if args.config is not None:
+        tutor_constraints = constraints.load(args.config, args.tutors, rooms)
+    return Timetable(start, args.test, rooms, args.tutors, args.groups, tutor_constraints)
+
+##
+# Runs all tasks with 'processes' worker processes. Returns the rows of the
+# results table.
+##
+def sweep(timetable, geometry, eval_func_str, tasks, processes=1):
+    log = logging.getLogger("sweep")
+    rows = []
+    if processes > 1:
+        pool = multiprocessing.Pool(processes, init_worker, (timetable, geometry, eval_func_str))
+        results = pool.imap_unordered(run, tasks)
+    else:
+        init_worker(timetable, geometry, eval_func_str)
+        results = itertools.imap(run, tasks)
+    for row in results:
+        log.info('Point %d, seed %d: score %.2f, reference score %.2f (%.1fs)', row['point'],
+                 row['seed'], row['score'], row['reference_score'], row['wall_time'])
+        rows.append(row)
+    if processes > 1:
+        pool.close()
+        pool.join()
+    return sorted(rows, key=lambda r: (r['point'], r['seed']))
+
+##
+# Writes the results table.
+##
+def write_results(filename, rows, param_names):
+    columns = ['point', 'seed'] + param_names + ['score', 'reference_score'] \
+              + fastmeasures.MEASURE_NAMES \
+              + ['evaluations', 'evaluations_to_target', 'time_to_target', 'wall_time']
+    with open(filename, 'wb') as f:
+        writer = csv.DictWriter(f, columns)
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+
+##
+# Returns the summary (list of rows) of the runs per point.
+##
+def summarize(rows, ps):
+    summary = []
+    for index, point in enumerate(ps):
+        runs = [r for r in rows if r['point'] == index]
+        hits = [r for r in runs if r['evaluations_to_target'] is not None]
+        summary.append({
+            'point': index,
+            'params': point,
+            'runs': len(runs),
+            'success': len(hits) / float(len(runs)),
+            'reference_score': np.mean([r['reference_score'] for r in runs]),
+            'evaluations_to_target': np.mean([r['evaluations_to_target'] for r in hits]) if hits else None,
+            'time_to_target': np.mean([r['time_to_target'] for r in hits]) if hits else None,
+            'wall_time': np.mean([r['wall_time'] for r in runs]),
+        })
+    return sorted(summary, key=lambda s: (-s['success'], s['time_to_target'], -s['reference_score']))
+
+def main():
+    parser = argparse.ArgumentParser(description='Parameter sweep of the genetic algorithm ' \
+                                     'generating the test timetable.')
+    parser.add_argument('-t', '--test', type=int, choices=[1,2], default=1,
+                        help='Test number, default: 1st test.')
+    parser.add_argument('-g', '--groups', type=int, required=True,
+                        help='Number of student groups for the test.')
+    parser.add_argument('start', type=str,
+                        help='Start time and date of the test. Specify in format d.m.Y H:M, e.g., 22.01.2016 08:00.')
+    parser.add_argument('tutors', type=str, nargs='*', metavar='tutor', default=tutors,
+                        help='Names of the tutors. Default tutors: ' + str(tutors))
+    parser.add_argument('-c', '--config', type=str, default=None,
+                        help='Session configuration (JSON) with availability windows and preferred ' \
+                        'rooms of the tutors (see constraints.py), default: none.')
+    parser.add_argument('-O', '--optimize', type=str,
+                        choices=['piecewise_linear', 'fuzzy'], default='fuzzy',
+                        help='Evaluation function of optimization, default: fuzzy.')
+    parser.add_argument('-p', '--params', type=str, required=True,
+                        help='Parameter space (JSON, grid or random search, see sweep.py).')
+    parser.add_argument('-n', '--seeds', type=int, default=SEEDS,
+                        help='Number of runs (random seeds) per point, default: ' + str(SEEDS))
+    parser.add_argument('--seed', type=int, default=1,
+                        help='First random seed (runs of a point use consecutive seeds), default: 1')
+    parser.add_argument('--target', type=float, default=None,
+                        help='Target reference score, default: none.')
+    parser.add_argument('-j', '--jobs', type=int, default=multiprocessing.cpu_count(),
+                        help='Number of worker processes, default: number of CPUs.')
+    parser.add_argument('-o', '--output', type=str, default='sweep_results.csv',
+                        help='Results table (CSV), default: sweep_results.csv')
+    args = parser.parse_args()
+
+    t = build_timetable(args)
+    geometry = fastmeasures.Geometry(t)
+
+    with open(args.params, 'r') as f:
+        spec = json.load(f)
+    ps = points(spec, random.Random(args.seed))
+    tasks = [(index, point, args.seed + k, args.target)
+             for index, point in enumerate(ps) for k in range(args.seeds)]
+    logging.getLogger("sweep").info('%d points, %d runs, %d processes.', len(ps), len(tasks), args.jobs)
+
+    rows = sweep(t, geometry, args.optimize, tasks, args.jobs)
+    param_names = sorted(set(name for p in ps for name in p.keys()))
+    write_results(args.output, rows, param_names)
+
+    print 'point | runs | success | ref. score | evals to target | time to target | wall time | parameters'
+    for s in summarize(rows, ps):
+        evals = '%15.0f' % (s['evaluations_to_target']) if s['evaluations_to_target'] is not None else '%15s' % ('-')
+        ttt = '%13.1fs' % (s['time_to_target']) if s['time_to_target'] is not None else '%14s' % ('-')
+        print '%5d | %4d | %6.0f%% | %10.2f | %s | %s | %8.1fs | %s' % (
+            s['point'], s['runs'], 100*s['success'], s['reference_score'], evals, ttt,
+            s['wall_time'], json.dumps(s['params'], sort_keys=True))
+    print 'Results written to ' + args.output
+
+if __name__ == '__main__':
+    main()
@@ -12,6 +12,8 @@
 import logging
 import datetime
 
+import export
+
 ####################
 # global variables #
 ####################
@@ -73,9 +75,10 @@ class Timetable:
     #
     # The timetable is generated based on the number of rooms and groups of
     # students. Further it depends on the test number. The generation of an
-    # initial schedule is very specific to the OSUE course.
+    # initial schedule is very specific to the OSUE course. Availability and
+    # room preferences of the tutors (constraints.Constraints) are optional.
     ##
-    def __init__(self, start, test, rooms, tutors, num_groups):
+    def __init__(self, start, test, rooms, tutors, num_groups, constraints=None):
         # init logger for this class
         self._log = logging.getLogger("Timetable")
         self._log.setLevel(logging.DEBUG)
@@ -85,6 +88,7 @@ class Timetable:
         self.rooms = rooms
         self.tutors = tutors
         self.num_groups = num_groups
+        self.constraints = constraints
 
         if test == 1:
             self.testlen = TESTLEN_TEST1
@@ -174,7 +178,7 @@ class Timetable:
                     group += lab_rooms
                     cnt_slots = 0
                                   
-        self._log.debug('Initial timetable:\n' + str(self))
+        self._log.debug('Initial timetable:\n%s', self)
 
     ##
     # Returns slots as list.
@@ -183,92 +187,71 @@ class Timetable:
         return self._slots
 
     ##
-    # Prints the schedule to a file.
+    # Returns the run-length encoded tutor sequence of each room.
+    #
+    # A run is a maximal sequence of consecutive slots in a room supervised by
+    # the same tutor. Returns a list of (room, runs) tuples (in order of
+    # 'rooms'), where runs is a list of (tutor, start, end) tuples.
     ##
-    def print_timetable(self, filename):
-        rows = len(self._slot_matrix)
-        cols = len(self._slot_matrix[0])
-        a_file = open(filename, 'w')
-
-        # print schedule sorted by room
-        for r in range(rows):
-            s_last = None
-            for c in range(cols):
-                if self._slot_matrix[r][c] == None:
+    def get_runs(self):
+        runs = []
+        end_delta = datetime.timedelta(minutes = (self.slotlen))
+        for r in range(len(self._slot_matrix)):
+            room_runs = []
+            first = None
+            last = None
+            for s in self._slot_matrix[r]:
+                if s == None:
                     continue
-                # current slot
-                s = self._slot_matrix[r][c]
-                if s_last == None:
-                    s_last = s # set s_last to the first slot in the row
-                # new line when tutor changes
-                if s.tutor != s_last.tutor:
-                    line = self.rooms[r] + ',' + \
-                           s_last.tutor + ',' + \
-                           s_last.start.strftime('%H:%M') + ',' + \
-                           s.start.strftime('%H:%M') + '\n'
-                    a_file.write(line)
-                    s_last = s
-            # finalize room
-            end = s.start + datetime.timedelta(minutes = (self.slotlen))
-            line = self.rooms[r] + ',' + \
-                   s_last.tutor + ',' + \
-                   s_last.start.strftime('%H:%M') + ',' + \
-                   end.strftime('%H:%M') + '\n\n'
-            a_file.write(line)
+                if first != None and s.tutor != first.tutor:
+                    room_runs.append((first.tutor, first.start, s.start))
+                    first = None
+                if first == None:
+                    first = s
+                last = s
+            if first != None:
+                room_runs.append((first.tutor, first.start, last.start + end_delta))
+            runs.append((self.rooms[r], room_runs))
+        return runs
 
-        a_file.close()
+    ##
+    # Prints the schedule to a file.
+    ##
+    def print_timetable(self, filename, fmt='txt'):
+        export.export(self, filename, fmt)
 
     ##
     # Returns a string representation of the timetable.
     ##
     def __repr__(self):
-        ret = ''
-
-        # # timetable as list
-        # ret += '\nSlots:\n'
-        # for slot in self._slots:
-        #    ret += '%s\n' % (slot)
-        # ret += '\n'
-
-        # timetable as matrix (overlap of slots visible)
-        ret += '\nTimetable (groups):\n'
         rows = len(self._slot_matrix)
         cols = len(self._slot_matrix[0])
+        border = '       ' + '+----' * cols + '+\n'
+        ret = []
+
+        # timetable as matrix (overlap of slots visible)
+        ret.append('\nTimetable (groups):\n')
         for r in range(rows):
-            ret += '       '
-            for s in range(cols):
-                ret += '+----'
-            ret += '+\n'
-            ret += '  %3s  ' % (self.rooms[r])
-            for s in range(cols):
+            ret.append(border)
+            ret.append('  %3s  ' % (self.rooms[r]))
+            for s in self._slot_matrix[r]:
                 group = '  '
-                if self._slot_matrix[r][s] != None:
-                    group = '%2d' % (self._slot_matrix[r][s].group)
-                ret += '| %s ' % (group)
-            ret += '|\n'
-            ret += '       '
-            for s in range(cols):
-                ret += '+----';
-            ret += '+\n'
-                          
-        ret += '\nTimetable (tutors):\n'
-        rows = len(self._slot_matrix)
-        cols = len(self._slot_matrix[0])
+                if s != None:
+                    group = '%2d' % (s.group)
+                ret.append('| %s ' % (group))
+            ret.append('|\n')
+            ret.append(border)
+
+        ret.append('\nTimetable (tutors):\n')
         for r in range(rows):
-            ret += '       '
-            for s in range(cols):
-                ret += '+----'
-            ret += '+\n'
-            ret += '  %3s  ' % (self.rooms[r])
-            for s in range(cols):
+            ret.append(border)
+            ret.append('  %3s  ' % (self.rooms[r]))
+            for s in self._slot_matrix[r]:
                 tutor = '  '
-                if self._slot_matrix[r][s] != None:
-                    tutor = self._slot_matrix[r][s].tutor
-                ret += '| %.2s ' % (tutor)
-            ret += '|\n'
-            ret += '       '
-            for s in range(cols):
-                ret += '+----';
-            ret += '+\n'
+                if s != None:
+                    tutor = s.tutor
+                ret.append('| %.2s ' % (tutor))
+            ret.append('|\n')
+            ret.append(border)
 
-        return ret
+        return ''.join(ret)